@@ -11,7 +11,7 @@ from src.orchestration.workflow import (
     initiate_analysis_async, execute_approved_analysis_async
 )
 from src.prisma_utils import context as prisma_context
-from src.utils.intent_classifier import classify_user_intent
+from src.utils.intent_classifier import classify_user_intent_async
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 logger = logging.getLogger(__name__)
@@ -36,12 +36,12 @@ async def analyze(request: AnalysisRequest):
         logger.info(f"API: Processing analysis request: '{user_query[:50]}...'")
         
         # Analyze the request intent
-        intent, confidence = classify_user_intent(user_query)
+        intent, confidence = await classify_user_intent_async(user_query)
         logger.info(f"Query classified as {intent} (confidence: {confidence:.2f})")
         
         # Handle descriptive exploratory request
         if intent == "exploratory_descriptive":
-            result = await initiate_analysis_async(user_query, DB_URI)
+            result = await initiate_analysis_async(user_query, DB_URI, (intent, confidence))
             
             if 'error' in result:
                 logger.error(f"Descriptive analysis error: {result['error']}")
@@ -56,7 +56,7 @@ async def analyze(request: AnalysisRequest):
         
         # Handle analytical exploratory request
         if intent == "exploratory_analytical":
-            result = await initiate_analysis_async(user_query, DB_URI)
+            result = await initiate_analysis_async(user_query, DB_URI, (intent, confidence))
             
             if 'error' in result:
                 logger.error(f"Exploratory analysis error: {result['error']}")
@@ -70,7 +70,7 @@ async def analyze(request: AnalysisRequest):
                 )
         
         # For specific analysis requests, generate SQL
-        result = await initiate_analysis_async(user_query, DB_URI)
+        result = await initiate_analysis_async(user_query, DB_URI, (intent, confidence))
         
         if 'error' in result:
             # Check if this is due to an infeasible plan
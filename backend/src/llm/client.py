@@ -1,12 +1,14 @@
 # src/llm/client.py
 
 import os
+import asyncio
 import logging
 from typing import Optional, Dict, List, Any
 import openai
-from openai import OpenAI, APIError, RateLimitError, AuthenticationError # Import specific errors
+from openai import OpenAI, AsyncOpenAI, NOT_GIVEN, APIError, RateLimitError, AuthenticationError # Import specific errors
 from dotenv import load_dotenv # Import load_dotenv
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
 # Explicitly load .env.local if that's your filename
@@ -24,6 +26,7 @@ logger = logging.getLogger(__name__)
 # --- Initialize OpenAI Client ---
 # Make initialization failure more explicit
 client: Optional[OpenAI] = None # Initialize as None
+async_client: Optional[AsyncOpenAI] = None # Used by call_llm_async
 try:
     # Explicitly check if the key was loaded
     api_key = os.getenv("OPENAI_API_KEY")
@@ -37,6 +40,7 @@ try:
 
     # Initialize client (this will use the key loaded into the environment)
     client = OpenAI()
+    async_client = AsyncOpenAI()
     # Optional: Test connection (uncomment if needed, might incur small cost/time)
     # openai_client.models.list()
     logger.info("OpenAI client initialized successfully.")
@@ -66,6 +70,7 @@ LLM_TEMPERATURE = 0.7
 MAX_HISTORY_TOKENS = 3000 # Rough estimate, tune as needed to prevent context overflow
 MAX_RETRIES = 2
 RETRY_DELAY_SECONDS = 3
+LLM_BATCH_MAX_WORKERS = 4 # Concurrent requests issued by call_llm_batch
 
 
 def _estimate_token_count(messages: List[Dict[str, str]]) -> int:
@@ -76,7 +81,8 @@ def _estimate_token_count(messages: List[Dict[str, str]]) -> int:
     return count
 
 
-def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
+def call_llm(prompt: str, conversation_id: Optional[str] = None, system_prompt: Optional[str] = None,
+             max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> str:
     """
     Calls the OpenAI LLM (gpt-4o) mimicking the get_answer interface.
     Manages conversation history in memory based on conversation_id.
@@ -84,6 +90,10 @@ def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
     Args:
         prompt (str): The user's current prompt/message.
         conversation_id (Optional[str]): Identifier to maintain conversation context.
+        system_prompt (Optional[str]): Static instructions sent as the first (system) message.
+            Keep it identical across calls so OpenAI's automatic prompt caching can reuse the prefix.
+        max_tokens (Optional[int]): Cap on generated tokens, for callers expecting a short fixed answer.
+        temperature (Optional[float]): Overrides LLM_TEMPERATURE for this call.
 
     Returns:
         str: The LLM's text response.
@@ -91,11 +101,15 @@ def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
     Raises:
         Exception: If the LLM API call fails after retries.
     """
-    logger.info(f"Calling LLM (Model: {LLM_MODEL}, Temp: {LLM_TEMPERATURE}, ConvID: {conversation_id})")
-    if len(prompt) > 300:
-        logger.debug(f"LLM User Prompt (start): {prompt[:300]}...")
-    else:
-        logger.debug(f"LLM User Prompt: {prompt}")
+    if temperature is None:
+        temperature = LLM_TEMPERATURE
+    logger.info(f"Calling LLM (Model: {LLM_MODEL}, Temp: {temperature}, ConvID: {conversation_id})")
+    # Prompts can be large; skip the slice and formatting unless debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        if len(prompt) > 300:
+            logger.debug("LLM User Prompt (start): %s...", prompt[:300])
+        else:
+            logger.debug("LLM User Prompt: %s", prompt)
 
     messages: List[Dict[str, str]] = []
     if conversation_id:
@@ -111,15 +125,20 @@ def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
     # Add the current user prompt
     messages.append({"role": "user", "content": prompt})
 
+    # The system prompt is prepended per request and never stored in the history
+    request_messages = messages
+    if system_prompt:
+        request_messages = [{"role": "system", "content": system_prompt}] + messages
+
     retries = 0
     while retries <= MAX_RETRIES:
         try:
-            logger.debug(f"Attempt {retries+1}/{MAX_RETRIES+1}. Sending {len(messages)} messages to OpenAI.")
+            logger.debug(f"Attempt {retries+1}/{MAX_RETRIES+1}. Sending {len(request_messages)} messages to OpenAI.")
             response = client.chat.completions.create(
                 model=LLM_MODEL,
-                messages=messages,
-                temperature=LLM_TEMPERATURE,
-                # max_tokens=1000, # Optional: Limit response length
+                messages=request_messages,
+                temperature=temperature,
+                max_tokens=max_tokens if max_tokens is not None else NOT_GIVEN,
                 # Add other parameters like top_p, presence_penalty if needed
             )
 
@@ -127,10 +146,11 @@ def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
             assistant_response = assistant_response.strip() if assistant_response else ""
 
             logger.info(f"LLM call successful. Response length: {len(assistant_response)}")
-            if len(assistant_response) > 300:
-                logger.debug(f"LLM Response (start): {assistant_response[:300]}...")
-            else:
-                logger.debug(f"LLM Response: {assistant_response}")
+            if logger.isEnabledFor(logging.DEBUG):
+                if len(assistant_response) > 300:
+                    logger.debug("LLM Response (start): %s...", assistant_response[:300])
+                else:
+                    logger.debug("LLM Response: %s", assistant_response)
 
             # If using conversation ID, store the history
             if conversation_id:
@@ -158,6 +178,87 @@ def call_llm(prompt: str, conversation_id: Optional[str] = None) -> str:
     raise Exception("LLM call failed after exhausting retries.")
 
 
+async def call_llm_async(prompt: str, system_prompt: Optional[str] = None) -> str:
+    """
+    Async, stateless variant of call_llm, so several LLM requests can be awaited
+    concurrently (e.g. with asyncio.gather) without blocking the event loop.
+
+    Args:
+        prompt (str): The user prompt.
+        system_prompt (Optional[str]): Static instructions sent as the first (system) message.
+
+    Returns:
+        str: The LLM's response content.
+
+    Raises:
+        Exception: If the LLM API call fails after retries.
+    """
+    logger.info(f"Calling LLM asynchronously (Model: {LLM_MODEL}, Temp: {LLM_TEMPERATURE})")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("LLM User Prompt (start): %s...", prompt[:300])
+
+    request_messages = [{"role": "user", "content": prompt}]
+    if system_prompt:
+        request_messages.insert(0, {"role": "system", "content": system_prompt})
+
+    retries = 0
+    while retries <= MAX_RETRIES:
+        try:
+            response = await async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=request_messages,
+                temperature=LLM_TEMPERATURE,
+            )
+
+            assistant_response = response.choices[0].message.content
+            assistant_response = assistant_response.strip() if assistant_response else ""
+            logger.info(f"Async LLM call successful. Response length: {len(assistant_response)}")
+            return assistant_response
+
+        except RateLimitError as e:
+            retries += 1
+            logger.warning(f"Rate limit error calling OpenAI (Attempt {retries}/{MAX_RETRIES+1}): {e}. Retrying in {RETRY_DELAY_SECONDS}s...")
+            if retries > MAX_RETRIES:
+                logger.error("Max retries exceeded for rate limit error.")
+                raise Exception(f"LLM Rate Limit Error after {MAX_RETRIES} retries: {e}") from e
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+        except APIError as e:
+            logger.error(f"OpenAI API Error: {e}")
+            raise Exception(f"LLM API Error: {e}") from e
+        except Exception as e:
+            logger.error(f"Unexpected error calling LLM: {e}")
+            raise Exception(f"Unexpected error during LLM call: {e}") from e
+
+    raise Exception("LLM call failed after exhausting retries.")
+
+
+def call_llm_batch(prompts: List[str], system_prompt: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Calls the LLM for several independent, stateless prompts concurrently.
+    All requests share the same system prompt, so after the first one the
+    provider can serve the common prefix from its prompt cache.
+
+    Args:
+        prompts (List[str]): User prompts, one per request.
+        system_prompt (Optional[str]): Static instructions shared by every request.
+
+    Returns:
+        List[Optional[str]]: Responses in the order of the prompts; None where the call failed.
+    """
+    def _call(prompt: str) -> Optional[str]:
+        try:
+            return call_llm(prompt, system_prompt=system_prompt)
+        except Exception as e:
+            logger.error(f"Batched LLM call failed: {e}")
+            return None
+
+    if not prompts:
+        return []
+    logger.info(f"Calling LLM for a batch of {len(prompts)} prompts")
+    with ThreadPoolExecutor(max_workers=min(LLM_BATCH_MAX_WORKERS, len(prompts))) as executor:
+        return list(executor.map(_call, prompts))
+
+
 # Example Usage (Requires OPENAI_API_KEY to be set in .env or environment)
 if __name__ == "__main__":
     logger.info("\n--- Testing OpenAI LLM Client ---")
@@ -308,25 +308,11 @@ Provide your corrected SQL query below:
 """
     return prompt.strip()
 
-def get_schema_suggestion_prompt(csv_samples: Dict[str, str]) -> str:
-    """
-    Generates the prompt for the LLM to suggest a Prisma schema.
-
-    Args:
-        csv_samples: Dictionary mapping filename to string containing headers and sample rows.
-
-    Returns:
-        The formatted prompt string.
-    """
-    sample_texts = []
-    for filename, content in csv_samples.items():
-        sample_texts.append(f"-- Start Sample: {filename} --\n{content}\n-- End Sample: {filename} --")
-
-    all_samples_text = "\n\n".join(sample_texts)
-
-    prompt = f"""
+# Static instructions for schema suggestion. Sent as the system message and kept
+# byte-identical across calls so the provider can reuse its cached prefix.
+SCHEMA_SUGGESTION_SYSTEM_PROMPT = """
 You are an expert database schema designer specializing in Prisma schema syntax for SQLite.
-Analyze the following CSV samples (headers and first few data rows) provided by the user.
+Analyze the CSV samples (headers and first few data rows) provided by the user.
 Your goal is to generate a *suggested* `schema.prisma` file content.
 
 RULES:
@@ -347,28 +333,46 @@ RULES:
 10. Do NOT include any explanations, apologies, or text outside the schema definition itself. This output will be saved directly to a file.
 11. IMPORTANT: ALWAYS include `@@map("filename_base")` for every model to ensure exact table name matching with original CSV names. Example: for customers.csv, use: @@map("customers")
 
-CSV SAMPLES:
-{all_samples_text}
-
-Generate the suggested `schema.prisma` content below:
+Start the schema with these blocks, followed by the inferred models:
 
 ```prisma
 // Datasource and Generator Blocks
-datasource db {{
+datasource db {
   provider = "sqlite"
   url      = env("DATABASE_URL")
-}}
+}
 
-generator client {{
+generator client {
   provider = "prisma-client-py"
   // interface = "asyncio" // Optional: uncomment if needed
-}}
+}
 
 // Inferred Models Below
 ```
-"""
-    # The ```prisma block helps guide the LLM output format
-    return prompt.strip()
+""".strip()
+
+def get_schema_suggestion_prompt(csv_samples: Dict[str, str]) -> str:
+    """
+    Generates the user prompt for the LLM to suggest a Prisma schema.
+    Only the CSV samples vary; the instructions live in SCHEMA_SUGGESTION_SYSTEM_PROMPT.
+
+    Args:
+        csv_samples: Dictionary mapping filename to string containing headers and sample rows.
+
+    Returns:
+        The formatted prompt string.
+    """
+    sample_texts = []
+    for filename, content in csv_samples.items():
+        sample_texts.append(f"-- Start Sample: {filename} --\n{content}\n-- End Sample: {filename} --")
+
+    # Assembled with a single join rather than an f-string plus strip(), which would
+    # copy the (potentially large) sample text twice more
+    return "".join([
+        "CSV SAMPLES:\n",
+        "\n\n".join(sample_texts),
+        "\n\nGenerate the suggested `schema.prisma` content for these CSV files."
+    ])
 
 def get_insight_suggestion_prompt(user_request: str, database_context: str) -> str:
     """
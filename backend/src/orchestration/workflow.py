@@ -273,11 +273,18 @@ def execute_approved_analysis(session_id: str, approved_sql: str) -> Dict[str, A
         return {'error': f"Analysis execution failed: {e}"}
 
 # Add async versions of the workflow functions
-async def initiate_analysis_async(user_request: str, db_uri: str) -> Dict[str, Any]:
+async def initiate_analysis_async(user_request: str, db_uri: str,
+                                  intent_classification: Optional[Tuple[str, float]] = None) -> Dict[str, Any]:
     """
     Starts analysis: gets Prisma context, plans, validates plan, generates SQL (async compatible).
     For exploratory requests, generates insight suggestions instead.
     Stores state associated with a new session ID.
+
+    Args:
+        user_request: The user's natural language query
+        db_uri: The database URI
+        intent_classification: (intent, confidence) if the caller already classified the
+            request; otherwise it is classified here without blocking the event loop
     """
     session_id = uuid.uuid4().hex
     logger.info(f"Initiating analysis (async) for request: '{user_request[:50]}...'. Session ID: {session_id}")
@@ -289,8 +296,10 @@ async def initiate_analysis_async(user_request: str, db_uri: str) -> Dict[str, A
             raise ValueError(f"Failed to get database context: {db_context}")
 
         # Determine if this is an exploratory/insight request
-        from src.utils.intent_classifier import classify_user_intent
-        intent, confidence = classify_user_intent(user_request)
+        if intent_classification is None:
+            from src.utils.intent_classifier import classify_user_intent_async
+            intent_classification = await classify_user_intent_async(user_request)
+        intent, confidence = intent_classification
         
         # Log initial step
         print(f"[History Stub - {session_id}] Step: Request Received - Input: {user_request}")
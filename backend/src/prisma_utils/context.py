@@ -1,5 +1,6 @@
 import re
 import logging
+import functools
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import sqlalchemy
@@ -9,6 +10,11 @@ from src.prisma_utils.analysis_loader import load_analysis_data, format_analysis
 
 logger = logging.getLogger(__name__)
 
+# Prisma scalar types; anything else starting with a capital letter is a relation
+_PRIMITIVE_TYPES = frozenset(['String', 'Int', 'BigInt', 'Float', 'Decimal', 'Boolean', 'DateTime', 'Json', 'Bytes'])
+# First letters of the scalar types, used as a cheap pre-check before the set lookup
+_PRIMITIVE_FIRST_CHARS = frozenset(t[0] for t in _PRIMITIVE_TYPES)
+
 def _parse_prisma_schema(schema_path: Path = Path("prisma/schema.prisma")) -> Dict[str, Any]:
     """
     Parses a Prisma schema file and extracts model definitions.
@@ -77,11 +83,9 @@ def _parse_prisma_schema(schema_path: Path = Path("prisma/schema.prisma")) -> Di
                 field_attrs_str = field_match.group(3) or ""
                 
                 # Skip relation fields (they start with a capital letter in type)
-                if field_type[0].isupper() and not (field_type.startswith('Int') or 
-                                                   field_type.startswith('String') or 
-                                                   field_type.startswith('Float') or 
-                                                   field_type.startswith('Boolean') or 
-                                                   field_type.startswith('DateTime')):
+                first = field_type[0]
+                if first.isupper() and (first not in _PRIMITIVE_FIRST_CHARS or
+                                        field_type.rstrip('?') not in _PRIMITIVE_TYPES):
                     continue
                 
                 # Parse field attributes
@@ -109,11 +113,9 @@ def _parse_prisma_schema(schema_path: Path = Path("prisma/schema.prisma")) -> Di
                 rel_type = rel_match.group(2)
                 
                 # Only process if it's a relation (type starts with capital letter and isn't a primitive)
-                if rel_type[0].isupper() and not (rel_type.startswith('Int') or 
-                                                rel_type.startswith('String') or 
-                                                rel_type.startswith('Float') or 
-                                                rel_type.startswith('Boolean') or 
-                                                rel_type.startswith('DateTime')):
+                first = rel_type[0]
+                if first.isupper() and (first not in _PRIMITIVE_FIRST_CHARS or
+                                        rel_type.rstrip('?') not in _PRIMITIVE_TYPES):
                     fields_str = rel_match.group(3) or ""
                     refs_str = rel_match.group(4) or ""
                     
@@ -183,7 +185,7 @@ def get_prisma_database_context_string(db_uri: str, schema_path: Path = Path("pr
                     context_parts.append(formatted_analysis)
             
             # Generate a simple description based on the model name and relations
-            model_description = _generate_model_description(model_name, model_info)
+            model_description = _generate_model_description(model_name)
             context_parts.append(f"/// {model_description}")
             
             # Identify primary key
@@ -288,8 +290,9 @@ def get_prisma_database_context_string(db_uri: str, schema_path: Path = Path("pr
         logger.error(f"Error generating database context: {e}")
         return f"Error: An unexpected error occurred during context generation: {e}"
 
-def _generate_model_description(model_name: str, model_info: Dict[str, Any]) -> str:
-    """Generate a simple description for a model based on its name and structure."""
+@functools.lru_cache(maxsize=1024)
+def _generate_model_description(model_name: str) -> str:
+    """Generate a simple description for a model based on its name."""
     # Check if it's a typical model by looking at its name
     model_name_lower = model_name.lower()
     
@@ -313,6 +316,7 @@ def _generate_model_description(model_name: str, model_info: Dict[str, Any]) ->
         # Generic description based on the table name
         return f"Contains data for {model_name.replace('_', ' ').lower()}."
 
+@functools.lru_cache(maxsize=2048)
 def _generate_field_description(field_name: str, field_type: str, model_name: str) -> str:
     """Generate a simple description for a field based on its name and type."""
     name_lower = field_name.lower()
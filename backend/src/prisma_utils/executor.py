@@ -152,21 +152,16 @@ def execute_sqlite_cli_sql(sql_query: str, db_path: str = "analysis.db") -> Tupl
         if not Path(db_path).exists():
             return [], f"Error: Database file {db_path} not found"
         
-        # Create temp file for SQL
-        sql_file = Path("temp_query.sql")
-        sql_file.write_text(sql_query)
-        
-        # Execute SQL using sqlite3 CLI with JSON output
+        # Execute SQL using sqlite3 CLI with JSON output, piping the query via stdin
+        # (-batch/-bail: non-interactive mode, stop at the first failing statement)
         result = subprocess.run(
-            ["sqlite3", db_path, "-json", f".read {sql_file}"],
+            ["sqlite3", "-batch", "-bail", "-json", db_path],
+            input=sql_query,
             capture_output=True,
             text=True,
             check=False
         )
-        
-        # Clean up temp file
-        sql_file.unlink()
-        
+
         if result.returncode != 0:
             logger.error(f"SQLite CLI error: {result.stderr}")
             return [], f"SQLite error: {result.stderr}"
@@ -1,4 +1,4 @@
 # Make schema_generator a proper module
-from .suggest import suggest_schema_from_csvs
+from .suggest import suggest_schema_from_csvs, suggest_schema_from_csvs_async, suggest_schemas_from_csv_batches
 
-__all__ = ['suggest_schema_from_csvs']
+__all__ = ['suggest_schema_from_csvs', 'suggest_schema_from_csvs_async', 'suggest_schemas_from_csv_batches']
@@ -1,28 +1,70 @@
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
 
-def sample_csvs(file_paths: List[Union[str, Path]], num_rows: int = 10) -> Dict[str, str]:
-    """Reads headers and sample rows from multiple CSVs."""
-    samples = {}
-    for file_path in file_paths:
-        path = Path(file_path)
-        if not path.is_file():
-            logger.warning(f"CSV file not found, skipping sampling: {path}")
-            samples[path.name] = "Error: File not found."
-            continue
+# Use pyarrow's multithreaded CSV reader when available, pandas otherwise
+try:
+    from pyarrow import csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
+# Only the first block is parsed when sampling with pyarrow
+SAMPLE_BLOCK_SIZE = 1 << 16
+# Upper bound on threads used to sample several CSVs at once
+MAX_SAMPLING_WORKERS = 8
+
+
+def _read_sample(path: Path, num_rows: int) -> pd.DataFrame:
+    """Reads the first num_rows rows of a CSV into a DataFrame."""
+    if PYARROW_AVAILABLE:
+        reader = pacsv.open_csv(str(path), read_options=pacsv.ReadOptions(block_size=SAMPLE_BLOCK_SIZE))
         try:
-            logger.info(f"Sampling {num_rows} rows from {path.name}...")
-            df_sample = pd.read_csv(path, nrows=num_rows)
-            header = ",".join(df_sample.columns)
-            # Convert sample rows back to CSV-like string format
-            sample_data_str = df_sample.to_csv(index=False, header=False, lineterminator='\n').strip()
-            samples[path.name] = f"Headers:\n{header}\n\nSample Data:\n{sample_data_str}"
-        except Exception as e:
-            logger.error(f"Error sampling file {path.name}: {e}")
-            samples[path.name] = f"Error: Could not sample file ({e})"
-    return samples
+            batch = reader.read_next_batch()
+        except StopIteration:
+            # Header-only file: no batch, but the schema still carries the column names
+            return reader.schema.empty_table().to_pandas()
+        return batch.slice(0, num_rows).to_pandas()
+    return pd.read_csv(path, nrows=num_rows)
+
+
+def _sample_csv(file_path: Union[str, Path], num_rows: int) -> Tuple[str, str, bool]:
+    """Reads the header and sample rows of one CSV. Returns (file name, sample text, failed)."""
+    path = Path(file_path)
+    if not path.is_file():
+        logger.warning(f"CSV file not found, skipping sampling: {path}")
+        return path.name, "Error: File not found.", True
+
+    try:
+        logger.info(f"Sampling {num_rows} rows from {path.name}...")
+        df_sample = _read_sample(path, num_rows)
+        header = ",".join(df_sample.columns)
+        # Convert sample rows back to CSV-like string format
+        sample_data_str = df_sample.to_csv(index=False, header=False, lineterminator='\n').strip()
+        return path.name, f"Headers:\n{header}\n\nSample Data:\n{sample_data_str}", False
+    except Exception as e:
+        logger.error(f"Error sampling file {path.name}: {e}")
+        return path.name, f"Error: Could not sample file ({e})", True
+
+
+def sample_csvs(file_paths: List[Union[str, Path]], num_rows: int = 10) -> Tuple[Dict[str, str], int]:
+    """
+    Reads headers and sample rows from multiple CSVs, sampling files concurrently.
+
+    Returns:
+        Tuple of (samples keyed by file name, number of files that could not be sampled)
+    """
+    if len(file_paths) <= 1:
+        results = [_sample_csv(file_path, num_rows) for file_path in file_paths]
+    else:
+        # File reads and parsing release the GIL, so threads overlap the I/O across files
+        with ThreadPoolExecutor(max_workers=min(MAX_SAMPLING_WORKERS, len(file_paths))) as executor:
+            results = list(executor.map(lambda file_path: _sample_csv(file_path, num_rows), file_paths))
+
+    samples = {name: sample for name, sample, _ in results}
+    errors = sum(1 for _, _, failed in results if failed)
+    return samples, errors
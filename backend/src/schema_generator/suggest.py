@@ -1,125 +1,271 @@
+import asyncio
 import logging
-from typing import List, Dict, Union, Optional, Tuple
+import os
+import hashlib
+import csv
+import tempfile
+from dataclasses import dataclass
+from typing import List, Dict, Set, Union, Optional, Tuple, Final
 from pathlib import Path
 import re
-import traceback
 
 from src.schema_generator.sampler import sample_csvs
 from src.llm import client, prompts
 
 logger = logging.getLogger(__name__)
 
-def _validate_prisma_schema_output(llm_output: str) -> Tuple[bool, Optional[str]]:
+# Patterns compiled once at import; used on every schema suggestion.
+# _SCHEMA_TOKEN_RE tokenizes a whole schema in one pass: model openers, @relation fields
+# (the "one" side), array relation fields (the "many" side) and closing braces.
+_SCHEMA_TOKEN_RE = re.compile(
+    r'(?P<model>\bmodel\s+(?P<model_name>\w+)\s*{)'
+    r'|(?P<rel>(?P<rel_field>\w+)\s+(?P<rel_target>\w+)\s+@relation\(fields:\s*\[(?P<rel_source>[^\]]+)\],\s*references:\s*\[(?P<rel_reference>[^\]]+)\]\))'
+    r'|(?P<arr>(?P<arr_field>\w+)\s+(?P<arr_target>\w+)\[\])'
+    r'|(?P<end>})'
+)
+_GENERATOR_BLOCK_RE = re.compile(r'(generator\s+client\s*{[^}]*})', re.DOTALL)
+
+# Opt-in lint for non-nullable field types that often fail to load from CSV data
+SCHEMA_LINT_ENV_VAR = "DATAPULSE_SCHEMA_LINT"
+_RISKY_FIELD_TYPES = frozenset(["Int", "Float", "DateTime"])
+
+# Opt-in on-disk cache of validated schema suggestions, keyed by a fingerprint of the
+# CSV structure (file names, headers, value kinds) rather than the sampled values.
+# The fingerprint is predictable, so the cache lives in a private per-user directory
+SCHEMA_CACHE_ENV_VAR = "DATAPULSE_SCHEMA_CACHE"
+SCHEMA_CACHE_DIR = Path.home() / ".cache" / "datapulse" / "schema"
+_INT_VALUE_RE = re.compile(r"[+-]?\d+")
+_FLOAT_VALUE_RE = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?")
+_DATETIME_VALUE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+
+# LLM calls per suggestion: the first try plus one corrective retry
+SCHEMA_SUGGESTION_ATTEMPTS = 2
+
+# Block openers ("model Name {") used to trim preamble text; one alternation finds the
+# earliest opener of any kind in a single scan
+_SCHEMA_START_RE = re.compile(r"\b(datasource|generator|model)\s+\w+\s*{")
+
+# Inserted before the first model of every generated schema, located by _FIRST_MODEL_RE
+_FIRST_MODEL_RE = re.compile(r"^model\s", re.MULTILINE)
+_WARNING_COMMENT: Final[str] = """
+// WARNING: CSV DATA LOADING CONSIDERATIONS
+// If your CSV files contain empty values or strings that can't be converted to numbers,
+// consider making fields nullable (add ? to type) or use String type instead of Int/Float
+// for fields that might have mixed content.
+"""
+
+# Inserted after the generator block when _fix_missing_relations changed the schema
+_RELATIONS_WARNING_COMMENT: Final[str] = """
+// WARNING: Missing bidirectional relations were automatically added.
+// Please review the schema carefully before applying.
+"""
+_RELATIONS_GENERATOR_REPLACEMENT: Final[str] = f"\\1\n{_RELATIONS_WARNING_COMMENT}"
+
+# Fallback template returned when the LLM call fails or its output fails validation
+_DEFAULT_SCHEMA: Final[str] = """// Default schema template used as fallback
+datasource db {
+  provider = "sqlite"
+  url      = env("DATABASE_URL")
+}
+
+generator client {
+  provider = "prisma-client-py"
+}
+
+// Sample model stub - replace with proper models after review
+model DefaultTable {
+  id Int @id @default(autoincrement())
+  // Add fields based on your CSV data
+}
+"""
+
+# Fallback template returned when schema suggestion raises unexpectedly
+_ERROR_FALLBACK_SCHEMA: Final[str] = """// Fallback schema template due to error
+datasource db {
+  provider = "sqlite"
+  url      = env("DATABASE_URL")
+}
+
+generator client {
+  provider = "prisma-client-py"
+}
+
+// THIS IS A FALLBACK SCHEMA - ERROR OCCURRED DURING GENERATION
+// Review this schema and adjust based on your CSV files
+model DefaultTable {
+  id Int @id @default(autoincrement())
+  // Add fields based on your CSV data
+}
+"""
+
+@dataclass
+class ParsedSchema:
+    """
+    A Prisma schema together with the model structure extracted from it.
+    
+    Attributes:
+        source: The schema text
+        models: Model name -> body text between the braces
+        relations: Model name -> list of relation dicts with 'field', 'target_model' and
+            'type' ('one' or 'many'); 'one' relations also carry 'source_field' and 'target_field'
+        relation_types: (model name, target model) -> types of relations declared from the
+            model to the target, so reverse relations are looked up without scanning
+        field_names: Model name -> names of the fields declared in its body
+        body_spans: Model name -> (start, end) offsets of its body in source
+    """
+    source: str
+    models: Dict[str, str]
+    relations: Dict[str, List[Dict[str, str]]]
+    relation_types: Dict[Tuple[str, str], Set[str]]
+    field_names: Dict[str, Set[str]]
+    body_spans: Dict[str, Tuple[int, int]]
+
+def _parse_schema(schema_content: str) -> ParsedSchema:
+    """
+    Extracts model bodies and relation fields from a Prisma schema in a single scan,
+    so validation and relation fixing share one parse.
+    
+    Args:
+        schema_content: The Prisma schema string
+        
+    Returns:
+        The parsed schema
+    """
+    models: Dict[str, str] = {}
+    relations: Dict[str, List[Dict[str, str]]] = {}
+    field_names: Dict[str, Set[str]] = {}
+    body_spans: Dict[str, Tuple[int, int]] = {}
+    current_model = None
+    body_start = 0
+    
+    for token in _SCHEMA_TOKEN_RE.finditer(schema_content):
+        kind = token.lastgroup
+        if kind == 'model':
+            current_model = token.group('model_name')
+            body_start = token.end()
+            relations[current_model] = []
+        elif current_model is None:
+            # Fields and braces outside a model block (datasource, generator)
+            continue
+        elif kind == 'end':
+            model_body = schema_content[body_start:token.start()]
+            models[current_model] = model_body
+            body_spans[current_model] = (body_start, token.start())
+            # The first word of each field line is the field name; skip comments and @@ attributes
+            field_names[current_model] = {
+                words[0] for words in (line.split(None, 1) for line in model_body.splitlines())
+                if words and not words[0].startswith(("//", "@@"))
+            }
+            current_model = None
+        elif kind == 'rel':
+            relations[current_model].append({
+                'field': token.group('rel_field'),
+                'target_model': token.group('rel_target'),
+                'source_field': token.group('rel_source').strip(),
+                'target_field': token.group('rel_reference').strip(),
+                'type': 'one'
+            })
+        else:
+            relations[current_model].append({
+                'field': token.group('arr_field'),
+                'target_model': token.group('arr_target'),
+                'type': 'many'
+            })
+    
+    # Unterminated trailing model blocks are ignored, as they never matched before
+    for model_name in relations.keys() - models.keys():
+        del relations[model_name]
+    
+    relation_types: Dict[Tuple[str, str], Set[str]] = {}
+    for model_name, model_relations in relations.items():
+        for relation in model_relations:
+            relation_types.setdefault((model_name, relation['target_model']), set()).add(relation['type'])
+    
+    return ParsedSchema(schema_content, models, relations, relation_types, field_names, body_spans)
+
+def _validate_prisma_schema_output(parsed: ParsedSchema) -> Tuple[bool, Optional[str]]:
     """
     Performs basic checks on the LLM output for Prisma schema syntax.
     
+    Args:
+        parsed: The parsed schema extracted from the LLM output
+        
     Returns:
         Tuple of (is_valid, error_message)
     """
+    llm_output = parsed.source
     if not llm_output or not llm_output.strip():
         logger.error("LLM returned empty schema suggestion.")
         return False, "Empty schema suggestion"
     
-    # Check for essential blocks (can be improved with more robust parsing/regex)
-    if "datasource db" not in llm_output:
+    # Check for essential blocks in one forward pass: schemas normally list the datasource,
+    # then the generator, then models, so each search resumes where the previous hit was.
+    # Only the prefix before that hit is rescanned when the LLM used a different order.
+    datasource_pos = llm_output.find("datasource db")
+    if datasource_pos < 0:
         logger.error("LLM output missing 'datasource db' block.")
         return False, "Missing 'datasource db' block"
         
-    if "generator client" not in llm_output:
+    generator_pos = llm_output.find("generator client", datasource_pos)
+    if generator_pos < 0:
+        generator_pos = llm_output.find("generator client", 0, datasource_pos)
+    if generator_pos < 0:
         logger.error("LLM output missing 'generator client' block.")
         return False, "Missing 'generator client' block"
         
-    if "model " not in llm_output: # Needs at least one model
+    models_from = max(datasource_pos, generator_pos)
+    if llm_output.find("model ", models_from) < 0 and llm_output.find("model ", 0, models_from) < 0: # Needs at least one model
         logger.error("LLM output missing 'model' definition block.")
         return False, "Missing model definition block"
     
     # Check for common LLM explanation patterns outside comments
-    lines = llm_output.strip().splitlines()
-    non_comment_lines = [line for line in lines if not line.strip().startswith(("//", "#"))]
+    first_schema_line = next(
+        (stripped for stripped in (line.strip() for line in llm_output.splitlines())
+         if stripped and not stripped.startswith(("//", "#"))),
+        ""
+    )
     
-    if not non_comment_lines[0].lower().startswith(("datasource", "generator", "//", "#")):
+    if not first_schema_line.lower().startswith(("datasource", "generator")):
          logger.warning("LLM output might contain leading non-schema text.")
          # Could attempt to trim here, but risky. Rely on prompt for now.
     
-    # Check for potentially dangerous types where nullable might be required
-    # This is a heuristic to warn about possible data type issues
-    models = re.finditer(r'model\s+(\w+)\s*{([^}]*)}', llm_output, re.DOTALL)
+    # Models and their relations for validation
+    models, model_relations = parsed.models, parsed.relations
+    relation_types = parsed.relation_types
     
-    # Collect models and their relations for validation
-    model_relations = {}
-    
-    for model_match in models:
-        model_name = model_match.group(1)
-        model_body = model_match.group(2)
-        
-        # Look for non-nullable fields (no question mark) of types that might cause loading issues
-        risky_fields = re.finditer(r'\s*(\w+)\s+(Int|Float|DateTime)\s+(?!\?)', model_body)
-        for field_match in risky_fields:
-            field_name = field_match.group(1)
-            field_type = field_match.group(2)
-            logger.warning(f"Potential data load risk: Field '{field_name}' in model '{model_name}' is non-nullable {field_type}")
-            logger.warning(f"Consider making '{field_name}' nullable (add '?') if CSV might contain empty values or conversion errors")
-        
-        # Extract relations for bidirectional validation
-        relations = []
-        relation_matches = re.finditer(r'\s*(\w+)\s+(\w+)\s+@relation\(fields:\s*\[([^\]]+)\],\s*references:\s*\[([^\]]+)\]\)', model_body)
-        
-        for rel_match in relation_matches:
-            field_name = rel_match.group(1)
-            target_model = rel_match.group(2)
-            source_field = rel_match.group(3).strip()
-            target_field = rel_match.group(4).strip()
-            
-            relations.append({
-                'field': field_name,
-                'target_model': target_model,
-                'source_field': source_field,
-                'target_field': target_field
-            })
-        
-        # Also look for array relation fields (e.g., sales Sales[])
-        array_relation_matches = re.finditer(r'\s*(\w+)\s+(\w+)\[\]', model_body)
-        
-        for arr_rel_match in array_relation_matches:
-            field_name = arr_rel_match.group(1)
-            target_model = arr_rel_match.group(2)
-            
-            relations.append({
-                'field': field_name,
-                'target_model': target_model,
-                'is_array': True
-            })
-        
-        model_relations[model_name] = relations
+    # Look for non-nullable fields (no question mark) of types that might cause loading issues;
+    # a heuristic warning about possible data type issues
+    if os.getenv(SCHEMA_LINT_ENV_VAR) == "1" and logger.isEnabledFor(logging.WARNING):
+        for model_name, model_body in models.items():
+            risky_count = 0
+            for line in model_body.splitlines():
+                tokens = line.split(None, 2)
+                if len(tokens) >= 2 and tokens[1] in _RISKY_FIELD_TYPES:
+                    risky_count += 1
+            if risky_count:
+                logger.warning(f"Potential data load risk: model '{model_name}' has {risky_count} non-nullable Int/Float/DateTime field(s). "
+                               "Consider making them nullable (add '?') if CSV might contain empty values or conversion errors")
     
     # Validate bidirectional relations
     missing_relations = []
     for model_name, relations in model_relations.items():
         for relation in relations:
-            if relation.get('is_array', False):
+            if relation['type'] == 'many':
                 # This is the "many" side - check if there's a matching "one" side
                 target_model = relation['target_model']
-                target_relations = model_relations.get(target_model, [])
                     
                 # Check if target model has a relation back to this model
-                has_reverse = any(
-                    rel.get('target_model') == model_name and not rel.get('is_array', False)
-                    for rel in target_relations
-                )
+                has_reverse = 'one' in relation_types.get((target_model, model_name), ())
                     
                 if not has_reverse:
                     missing_relations.append(f"Model {target_model} is missing a relation back to {model_name}")
                 
-            elif 'source_field' in relation:
+            else:
                 # This is the "one" side - check if there's a matching "many" side
                 target_model = relation['target_model']
-                target_relations = model_relations.get(target_model, [])
                     
                 # Check if target model has an array relation back to this model
-                has_reverse = any(
-                    rel.get('target_model') == model_name and rel.get('is_array', False)
-                    for rel in target_relations
-                )
+                has_reverse = 'many' in relation_types.get((target_model, model_name), ())
                     
                 if not has_reverse:
                     missing_relations.append(f"Model {target_model} is missing a relation back to {model_name}")
@@ -135,107 +281,81 @@ def _validate_prisma_schema_output(llm_output: str) -> Tuple[bool, Optional[str]
 
 def _extract_prisma_schema_from_llm(raw_response: str) -> str:
     """Extracts schema content, attempting to remove markdown fences."""
-    logger.debug(f"Raw Schema Suggestion response: {raw_response[:500]}...")
-    
-    # Case 1: Look for ```prisma ... ``` block first
-    match = re.search(r"```(?:prisma)?\s*(.*?)\s*```", raw_response, re.DOTALL | re.IGNORECASE)
-    if match:
-        schema_content = match.group(1).strip()
-        logger.info("Extracted schema from markdown block.")
-        return schema_content
-    
-    # Case 2: Look for datasource db {...} pattern directly in the response
-    datasource_match = re.search(r"(datasource\s+db\s*{.*?})", raw_response, re.DOTALL)
-    if datasource_match:
-        # If we found a datasource block, assume the rest of the response is also part of the schema
-        logger.info("Detected datasource block directly in response.")
-        return raw_response.strip()
-    
-    # Case 3: If the response starts with comments (`//`), it might be a schema without markdown
-    if raw_response.strip().startswith("//"):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw Schema Suggestion response: %s...", raw_response[:500])
+    
+    # Case 1: Look for ```prisma ... ``` block first (plain substring scan, no regex)
+    fence_start = raw_response.find("```")
+    if fence_start >= 0:
+        fence_end = raw_response.find("```", fence_start + 3)
+        if fence_end > fence_start:
+            # Narrow the indices past the (case-insensitive) language tag and surrounding
+            # whitespace, then slice the schema out once
+            body_start, body_end = fence_start + 3, fence_end
+            if raw_response[body_start:min(body_start + 6, body_end)].lower() == "prisma":
+                body_start += 6
+            while body_start < body_end and raw_response[body_start].isspace():
+                body_start += 1
+            while body_end > body_start and raw_response[body_end - 1].isspace():
+                body_end -= 1
+            logger.info("Extracted schema from markdown block.")
+            return raw_response[body_start:body_end]
+    
+    stripped_response = raw_response.strip()
+    
+    # Case 2: If the response starts with comments (`//`), it might be a schema without markdown
+    if stripped_response.startswith("//"):
         logger.info("Response starts with comments, assuming it's a schema.")
-        return raw_response.strip()
-    
-    # Case 4: Last resort - clean the response and check if it has schema structure
-    cleaned_response = raw_response.strip()
-    
-    # Remove any preamble text before what looks like a schema section
-    schema_start_indicators = ["datasource", "generator", "model"]
-    for indicator in schema_start_indicators:
-        pattern = re.compile(f".*?({indicator}\\s+\\w+\\s*{{)", re.DOTALL)
-        match = pattern.match(cleaned_response)
-        if match:
-            start_index = match.start(1)
-            cleaned_response = cleaned_response[start_index:]
-            logger.info(f"Trimmed response to start at '{indicator}' block.")
-            break
+        return stripped_response
+    
+    # Case 3: Last resort - clean the response and check if it has schema structure
+    # (this also covers a bare `datasource db {...}` block, trimming any preamble before it)
+    cleaned_response = stripped_response
+    
+    # Remove any preamble text before the earliest block that looks like a schema section
+    schema_start = _SCHEMA_START_RE.search(cleaned_response)
+    if schema_start:
+        cleaned_response = cleaned_response[schema_start.start():]
+        logger.info(f"Trimmed response to start at '{schema_start.group(1)}' block.")
     
     logger.warning("No markdown block detected in schema suggestion. Using cleaned response.")
     return cleaned_response
 
-def _fix_missing_relations(schema_content: str) -> str:
+def _extract_and_validate(raw_response: str) -> Tuple[ParsedSchema, Optional[str]]:
+    """
+    Extracts the schema from a raw LLM response, parses it and validates it in one step.
+    
+    Returns:
+        Tuple of (parsed_schema, error_message); error_message is None if the schema is valid
+    """
+    schema_content = _extract_prisma_schema_from_llm(raw_response)
+    
+    # Log the extracted schema for debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracted schema (first 500 chars): %s...", schema_content[:500])
+    
+    parsed = _parse_schema(schema_content)
+    is_valid, error_msg = _validate_prisma_schema_output(parsed)
+    return parsed, None if is_valid else error_msg
+
+def _fix_missing_relations(parsed: ParsedSchema) -> str:
     """
     Analyzes a Prisma schema for missing bidirectional relations and attempts to fix them.
     
     Args:
-        schema_content: The original Prisma schema string
+        parsed: The parsed original Prisma schema
         
     Returns:
         Fixed schema with bidirectional relations added where missing
     """
     logger.info("Checking and fixing missing bidirectional relations in schema...")
     
-    # Extract all model blocks
-    models = {}
-    model_matches = re.finditer(r'model\s+(\w+)\s*{([^}]*)}', schema_content, re.DOTALL)
-    
-    for model_match in model_matches:
-        model_name = model_match.group(1)
-        model_body = model_match.group(2)
-        models[model_name] = model_body
+    # Model blocks and their relation fields, as parsed for validation
+    schema_content = parsed.source
+    models, relations = parsed.models, parsed.relations
     
     fixed_models = {}
     
-    # First pass: collect all relation information
-    relations = {}
-    for model_name, model_body in models.items():
-        model_relations = []
-        
-        # Find @relation fields (one-to-many, from the "one" side)
-        relation_matches = re.finditer(
-            r'\s*(\w+)\s+(\w+)\s+@relation\(fields:\s*\[([^\]]+)\],\s*references:\s*\[([^\]]+)\]\)', 
-            model_body
-        )
-        
-        for rel_match in relation_matches:
-            field_name = rel_match.group(1)
-            target_model = rel_match.group(2)
-            source_field = rel_match.group(3).strip()
-            target_field = rel_match.group(4).strip()
-            
-            model_relations.append({
-                'field': field_name,
-                'target_model': target_model,
-                'source_field': source_field,
-                'target_field': target_field,
-                'type': 'one'
-            })
-        
-        # Find array relation fields (from the "many" side)
-        array_relation_matches = re.finditer(r'\s*(\w+)\s+(\w+)\[\]', model_body)
-        
-        for arr_rel_match in array_relation_matches:
-            field_name = arr_rel_match.group(1)
-            target_model = arr_rel_match.group(2)
-            
-            model_relations.append({
-                'field': field_name,
-                'target_model': target_model,
-                'type': 'many'
-            })
-        
-        relations[model_name] = model_relations
-    
     # Second pass: find and fix missing relations
     for model_name, model_relations in relations.items():
         for relation in model_relations:
@@ -246,13 +366,8 @@ def _fix_missing_relations(schema_content: str) -> str:
                 logger.warning(f"Target model {target_model} for relation in {model_name} not found in schema")
                 continue
             
-            target_relations = relations[target_model]
-            
             # Check if there's a reverse relation
-            has_reverse = any(
-                rel['target_model'] == model_name 
-                for rel in target_relations
-            )
+            has_reverse = (target_model, model_name) in parsed.relation_types
             
             if not has_reverse:
                 # Need to add a reverse relation
@@ -266,13 +381,12 @@ def _fix_missing_relations(schema_content: str) -> str:
                         field_name = f"{field_name}s"
                     
                     # Check field name doesn't already exist
-                    field_pattern = re.compile(fr'\s*{field_name}\s+')
-                    if field_pattern.search(models[target_model]):
+                    existing_fields = parsed.field_names[target_model]
+                    if field_name in existing_fields:
                         # Try alternatives like items, entries, etc.
                         alternatives = [f"{model_name.lower()}Items", f"{model_name.lower()}Entries", f"{model_name.lower()}Records"]
                         for alt in alternatives:
-                            alt_pattern = re.compile(fr'\s*{alt}\s+')
-                            if not alt_pattern.search(models[target_model]):
+                            if alt not in existing_fields:
                                 field_name = alt
                                 break
                     
@@ -301,31 +415,209 @@ def _fix_missing_relations(schema_content: str) -> str:
                     else:
                         fixed_models[target_model] = f"{fixed_models[target_model]}{comment}\n"
     
-    # Copy any models that weren't modified
-    for model_name, model_body in models.items():
-        if model_name not in fixed_models:
-            fixed_models[model_name] = model_body
-    
-    # Reconstruct the schema
-    fixed_schema = schema_content
-    for model_name, fixed_body in fixed_models.items():
-        # Replace the model body
-        pattern = re.compile(f'model\\s+{model_name}\\s*{{([^}}]*?)}}', re.DOTALL)
-        fixed_schema = pattern.sub(f'model {model_name} {{{fixed_body}}}', fixed_schema)
+    # Reconstruct the schema in one pass, splicing the modified bodies in at their
+    # recorded offsets and copying everything else unchanged
+    parts = []
+    position = 0
+    for body_start, body_end, model_name in sorted(
+        (*parsed.body_spans[model_name], model_name) for model_name in fixed_models
+    ):
+        parts.append(schema_content[position:body_start])
+        parts.append(fixed_models[model_name])
+        position = body_end
+    parts.append(schema_content[position:])
+    fixed_schema = "".join(parts)
     
     # Add warning comment if we made changes
     if fixed_models:
-        warning = """
-// WARNING: Missing bidirectional relations were automatically added.
-// Please review the schema carefully before applying.
-"""
         # Add comment after generator block
-        generator_pattern = re.compile(r'(generator\s+client\s*{[^}]*})', re.DOTALL)
-        fixed_schema = generator_pattern.sub(f'\\1\n{warning}', fixed_schema)
+        fixed_schema = _GENERATOR_BLOCK_RE.sub(_RELATIONS_GENERATOR_REPLACEMENT, fixed_schema)
     
     return fixed_schema
 
 
+def _value_kind(value: str) -> str:
+    """Classifies a sampled CSV value as null, int, float, datetime, bool or string."""
+    if not value:
+        return "null"
+    if _INT_VALUE_RE.fullmatch(value):
+        return "int"
+    if _FLOAT_VALUE_RE.fullmatch(value):
+        return "float"
+    if _DATETIME_VALUE_RE.fullmatch(value):
+        return "datetime"
+    if value.lower() in ("true", "false"):
+        return "bool"
+    return "string"
+
+
+def _schema_fingerprint(samples: Dict[str, str]) -> str:
+    """
+    Hashes the structure of the CSV samples: file names, headers and the kinds of values
+    seen in each column. Sample sets that differ only in their values share a fingerprint,
+    and so share a cached schema.
+    """
+    digest = hashlib.sha256(prompts.SCHEMA_SUGGESTION_SYSTEM_PROMPT.encode("utf-8"))
+    for filename in sorted(samples):
+        sample = samples[filename]
+        header_part, separator, data = sample.partition("\n\nSample Data:\n")
+        if separator:
+            header = header_part[len("Headers:\n"):]
+            column_count = len(next(csv.reader([header]), []))
+            rows = list(csv.reader(data.splitlines()))
+            column_kinds = (
+                "|".join(sorted({_value_kind(row[i]) if i < len(row) else "null" for row in rows}))
+                for i in range(column_count)
+            )
+            structure = f"{header}\n{';'.join(column_kinds)}"
+        else:
+            # Sampling error message; keep it so a later successful sample misses the cache
+            structure = sample
+        digest.update(f"{filename}\0{structure}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _prepare_schema_prompt(csv_paths: List[Union[str, Path]]) -> Optional[Tuple[str, Optional[Path]]]:
+    """
+    Samples the CSVs and builds the user prompt.
+    
+    Returns:
+        Tuple of (prompt, cache_path), where cache_path is None when the schema cache is
+        disabled, or None if no file could be sampled.
+    """
+    samples, errors = sample_csvs(csv_paths)
+    if not samples or errors == len(csv_paths):
+        logger.error("Failed to get valid samples from CSV files.")
+        return None
+
+    prompt = prompts.get_schema_suggestion_prompt(samples)
+    
+    # Log sample data to help debug
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Generated CSV samples: %s", list(samples))
+        logger.debug("LLM prompt (first 500 chars): %s...", prompt[:500])
+
+    cache_path = None
+    if os.getenv(SCHEMA_CACHE_ENV_VAR) == "1":
+        cache_path = SCHEMA_CACHE_DIR / f"{_schema_fingerprint(samples)}.prisma"
+    return prompt, cache_path
+
+
+def _read_schema_cache(cache_path: Path) -> Optional[str]:
+    """
+    Returns a cached schema suggestion, or None on a miss. Entries are validated like a
+    fresh LLM response, so a corrupt or tampered file counts as a miss and is regenerated.
+    """
+    if not cache_path.is_file():
+        return None
+    try:
+        cached_schema = cache_path.read_text()
+    except OSError as cache_err:
+        logger.warning(f"Could not read schema suggestion cache {cache_path}: {cache_err}")
+        return None
+    
+    parsed, error_msg = _extract_and_validate(cached_schema)
+    if error_msg is None and parsed.source != cached_schema.strip():
+        # Entries are stored bare, so anything extraction had to trim was not written here
+        error_msg = "Unexpected text around the schema"
+    if error_msg is not None:
+        logger.warning(f"Ignoring invalid cached schema suggestion {cache_path}: {error_msg}")
+        return None
+    
+    logger.info(f"Using cached schema suggestion from {cache_path}")
+    return cached_schema
+
+
+def _write_schema_cache(cache_path: Path, schema: str) -> None:
+    """
+    Stores a validated schema suggestion; cache write failures are only logged.
+
+    The schema is written to a temporary file in the cache directory and moved into
+    place, so concurrent writers or readers never see a partially written entry.
+    """
+    tmp_path = None
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=f".{cache_path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(schema)
+        os.replace(tmp_path, cache_path)
+    except OSError as cache_err:
+        logger.warning(f"Could not write schema suggestion cache {cache_path}: {cache_err}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def _schema_from_llm_response(prompt: str, suggested_schema_raw: str) -> Optional[str]:
+    """
+    Turns the LLM's response to a schema prompt into the final schema.
+    
+    Args:
+        prompt: The user prompt the response answers (the CSV samples).
+        suggested_schema_raw: The raw LLM response.
+        
+    Returns:
+        The fixed and annotated schema, or None if no valid schema could be obtained.
+    """
+    # One corrective retry on validation failure. The system prompt stays identical,
+    # so the retry reuses the provider's cached prefix and only pays for the new suffix.
+    for attempt in range(1, SCHEMA_SUGGESTION_ATTEMPTS + 1):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw LLM response (first 500 chars): %s...", suggested_schema_raw[:500])
+
+        # Extract potentially fenced content and check it
+        parsed_schema, error_msg = _extract_and_validate(suggested_schema_raw)
+        if error_msg is None:
+            break
+
+        logger.error(f"LLM generated schema failed basic validation (attempt {attempt}/{SCHEMA_SUGGESTION_ATTEMPTS}): {error_msg}")
+        logger.debug("Invalid schema attempt:\n%s", parsed_schema.source)
+        if attempt == SCHEMA_SUGGESTION_ATTEMPTS:
+            return None
+
+        retry_prompt = (f"{prompt}\n\nYour previous response was invalid: {error_msg}. "
+                        "Return ONLY a valid Prisma schema.")
+        try:
+            suggested_schema_raw = client.call_llm(retry_prompt, system_prompt=prompts.SCHEMA_SUGGESTION_SYSTEM_PROMPT)
+        except Exception as llm_err:
+            logger.error(f"LLM call failed: {llm_err}")
+            return None
+
+    # Fix any missing bidirectional relations, reusing the parse from validation
+    fixed_schema = _fix_missing_relations(parsed_schema)
+    
+    # Add warning comments about potential nullable fields to the schema,
+    # after the generator block and before the first model
+    first_model = _FIRST_MODEL_RE.search(fixed_schema)
+    if first_model:
+        model_index = first_model.start()
+        fixed_schema = fixed_schema[:model_index] + _WARNING_COMMENT + "\n" + fixed_schema[model_index:]
+
+    logger.info("Successfully generated and validated schema suggestion.")
+    return fixed_schema
+
+
+def _finish_schema_suggestion(prompt: str, suggested_schema_raw: str, cache_path: Optional[Path]) -> str:
+    """
+    Validates and fixes the LLM's schema, caching it when enabled.
+    
+    Returns:
+        The fixed schema, or the default schema template if no valid schema was obtained.
+    """
+    fixed_schema = _schema_from_llm_response(prompt, suggested_schema_raw)
+    if fixed_schema is None:
+        # Return default schema as fallback
+        logger.warning("Using default schema template as fallback")
+        return _DEFAULT_SCHEMA
+
+    if cache_path is not None:
+        _write_schema_cache(cache_path, fixed_schema)
+    return fixed_schema
+
+
 def suggest_schema_from_csvs(csv_paths: List[Union[str, Path]]) -> Optional[str]:
     """
     Takes CSV paths, samples them, calls LLM to suggest a Prisma schema.
@@ -338,101 +630,117 @@ def suggest_schema_from_csvs(csv_paths: List[Union[str, Path]]) -> Optional[str]
     """
     logger.info(f"Starting schema suggestion based on CSVs: {csv_paths}")
     try:
-        samples = sample_csvs(csv_paths)
-        if not samples or all("Error:" in s for s in samples.values()):
-            logger.error("Failed to get valid samples from CSV files.")
+        prepared = _prepare_schema_prompt(csv_paths)
+        if prepared is None:
             return None
-
-        # Log sample data to help debug
-        logger.debug(f"Generated CSV samples: {list(samples.keys())}")
         
-        prompt = prompts.get_schema_suggestion_prompt(samples)
-        logger.debug(f"LLM prompt (first 500 chars): {prompt[:500]}...")
-        
-        # Add a fallback template in case the LLM fails to generate a proper schema
-        default_schema = """// Default schema template used as fallback
-datasource db {
-  provider = "sqlite"
-  url      = env("DATABASE_URL")
-}
-
-generator client {
-  provider = "prisma-client-py"
-}
-
-// Sample model stub - replace with proper models after review
-model DefaultTable {
-  id Int @id @default(autoincrement())
-  // Add fields based on your CSV data
-}
-"""
+        prompt, cache_path = prepared
+        cached_schema = _read_schema_cache(cache_path) if cache_path is not None else None
+        if cached_schema is not None:
+            return cached_schema
         
         try:
-            suggested_schema_raw = client.call_llm(prompt)
-            logger.debug(f"Raw LLM response (first 500 chars): {suggested_schema_raw[:500]}...")
+            suggested_schema_raw = client.call_llm(prompt, system_prompt=prompts.SCHEMA_SUGGESTION_SYSTEM_PROMPT)
         except Exception as llm_err:
             logger.error(f"LLM call failed: {llm_err}")
             logger.warning("Using default schema template as fallback")
-            return default_schema
+            return _DEFAULT_SCHEMA
 
-        # Extract potentially fenced content
-        suggested_schema = _extract_prisma_schema_from_llm(suggested_schema_raw)
-        
-        # Log the extracted schema for debugging
-        logger.debug(f"Extracted schema (first 500 chars): {suggested_schema[:500]}...")
-
-        is_valid, error_msg = _validate_prisma_schema_output(suggested_schema)
-        if not is_valid:
-            logger.error(f"LLM generated schema failed basic validation: {error_msg}")
-            logger.debug(f"Invalid schema attempt:\n{suggested_schema}")
-            # Return default schema as fallback
-            logger.warning("Using default schema template as fallback")
-            return default_schema
+        return _finish_schema_suggestion(prompt, suggested_schema_raw, cache_path)
+
+    except Exception as e:
+        logger.exception("Schema suggestion failed: %s", e)
+        # Return default schema template as fallback
+        return _ERROR_FALLBACK_SCHEMA
+
+
+async def suggest_schema_from_csvs_async(csv_paths: List[Union[str, Path]]) -> Optional[str]:
+    """
+    Async variant of suggest_schema_from_csvs. Sampling runs in a worker thread and the
+    LLM request is awaited, so several suggestions can overlap with asyncio.gather.
+
+    Args:
+        csv_paths: List of paths to input CSV files.
 
-        # Fix any missing bidirectional relations
-        fixed_schema = _fix_missing_relations(suggested_schema)
+    Returns:
+        The suggested schema content as a string, or None if generation fails.
+    """
+    logger.info(f"Starting async schema suggestion based on CSVs: {csv_paths}")
+    try:
+        prepared = await asyncio.to_thread(_prepare_schema_prompt, csv_paths)
+        if prepared is None:
+            return None
         
-        # Add warning comments about potential nullable fields to the schema
-        suggested_schema_lines = fixed_schema.splitlines()
-        warning_comment = """
-// WARNING: CSV DATA LOADING CONSIDERATIONS
-// If your CSV files contain empty values or strings that can't be converted to numbers,
-// consider making fields nullable (add ? to type) or use String type instead of Int/Float
-// for fields that might have mixed content.
-"""
-        # Find where to insert the warning (after generator block, before first model)
-        model_index = -1
-        for i, line in enumerate(suggested_schema_lines):
-            if line.strip().startswith("model "):
-                model_index = i
-                break
+        prompt, cache_path = prepared
+        cached_schema = _read_schema_cache(cache_path) if cache_path is not None else None
+        if cached_schema is not None:
+            return cached_schema
         
-        if model_index > 0:
-            # Insert warning before the first model
-            suggested_schema_lines.insert(model_index, warning_comment)
-            fixed_schema = "\n".join(suggested_schema_lines)
+        try:
+            suggested_schema_raw = await client.call_llm_async(prompt, system_prompt=prompts.SCHEMA_SUGGESTION_SYSTEM_PROMPT)
+        except Exception as llm_err:
+            logger.error(f"LLM call failed: {llm_err}")
+            logger.warning("Using default schema template as fallback")
+            return _DEFAULT_SCHEMA
 
-        logger.info("Successfully generated and validated schema suggestion.")
-        return fixed_schema
+        # Validation is fast, but a failed attempt makes a blocking corrective LLM call
+        return await asyncio.to_thread(_finish_schema_suggestion, prompt, suggested_schema_raw, cache_path)
 
     except Exception as e:
-        logger.error(f"Schema suggestion failed: {e}")
-        logger.error(traceback.format_exc())
-        # Return default schema template as fallback
-        return """// Fallback schema template due to error
-datasource db {
-  provider = "sqlite"
-  url      = env("DATABASE_URL")
-}
+        logger.exception("Schema suggestion failed: %s", e)
+        return _ERROR_FALLBACK_SCHEMA
 
-generator client {
-  provider = "prisma-client-py"
-}
 
-// THIS IS A FALLBACK SCHEMA - ERROR OCCURRED DURING GENERATION
-// Review this schema and adjust based on your CSV files
-model DefaultTable {
-  id Int @id @default(autoincrement())
-  // Add fields based on your CSV data
-}
-"""
+def suggest_schemas_from_csv_batches(batches: List[List[Union[str, Path]]]) -> List[Optional[str]]:
+    """
+    Suggests one Prisma schema per independent set of CSV files, sending the LLM
+    requests for all sets together so they share the cached system prompt.
+
+    Args:
+        batches: List of CSV path lists; each inner list yields one schema.
+
+    Returns:
+        One entry per batch, in order, with the same values suggest_schema_from_csvs would return.
+    """
+    logger.info(f"Starting batched schema suggestion for {len(batches)} CSV sets")
+    results: List[Optional[str]] = [None] * len(batches)
+    pending: List[Tuple[int, str, Optional[Path]]] = []
+
+    for index, csv_paths in enumerate(batches):
+        try:
+            prepared = _prepare_schema_prompt(csv_paths)
+            if prepared is None:
+                continue
+            prompt, cache_path = prepared
+            cached_schema = _read_schema_cache(cache_path) if cache_path is not None else None
+            if cached_schema is not None:
+                results[index] = cached_schema
+                continue
+            pending.append((index, prompt, cache_path))
+        except Exception as e:
+            logger.error(f"Schema suggestion failed for CSV set {index}: {e}")
+            results[index] = _ERROR_FALLBACK_SCHEMA
+
+    if not pending:
+        return results
+
+    raw_responses = client.call_llm_batch([prompt for _, prompt, _ in pending],
+                                          system_prompt=prompts.SCHEMA_SUGGESTION_SYSTEM_PROMPT)
+
+    for (index, prompt, cache_path), suggested_schema_raw in zip(pending, raw_responses):
+        try:
+            fixed_schema = None
+            if suggested_schema_raw is not None:
+                fixed_schema = _schema_from_llm_response(prompt, suggested_schema_raw)
+            if fixed_schema is None:
+                logger.warning(f"Using default schema template as fallback for CSV set {index}")
+                results[index] = _DEFAULT_SCHEMA
+                continue
+            if cache_path is not None:
+                _write_schema_cache(cache_path, fixed_schema)
+            results[index] = fixed_schema
+        except Exception as e:
+            logger.error(f"Schema suggestion failed for CSV set {index}: {e}")
+            results[index] = _ERROR_FALLBACK_SCHEMA
+
+    return results
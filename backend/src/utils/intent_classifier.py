@@ -1,10 +1,229 @@
+import asyncio
 import logging
 import re
-from typing import Tuple, Literal
+import string
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Final, FrozenSet, List, Set, Tuple, Literal, Optional
 from src.llm import client
 
 logger = logging.getLogger(__name__)
 
+# Optional Aho-Corasick automaton for the direct phrase scan
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Optional linear-time (DFA-based) engine for the pattern unions; falls back to re
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+_compile_union = re2.compile if RE2_AVAILABLE else re.compile
+
+# Requests asking what the data itself contains
+_DESCRIPTIVE_PATTERNS: Final[Tuple[str, ...]] = (
+    r"what (are|is) (these|this|the|those) (dataset|data|tables|database)s? about",
+    r"(describe|tell me about|overview of|summary of) (the|these|this|my) (data|dataset|tables)",
+    r"what (kind|type) of (data|information) (do |does |)(these|this|the|my) (dataset|data|tables)s? (have|contain)",
+    r"what('s| is) in (these|this|the|my) (data|dataset|tables|database)",
+    r"what (data|information) (do |)(i|we) have",
+    r"show me (what|the) data (i|we) have"
+)
+# Any descriptive pattern decides the intent, so they are fused into one alternation
+_DESCRIPTIVE_UNION = _compile_union("|".join(f"(?:{pattern})" for pattern in _DESCRIPTIVE_PATTERNS))
+
+# Common exploratory analytical phrases, matched as substrings in a single scan
+_ANALYTICAL_PHRASES: Final[Tuple[str, ...]] = (
+    "what are some suggested",
+    "what insights",
+    "suggest some",
+    "what analysis",
+    "what can i learn from",
+    "give me some insights",
+    "what are the main insights",
+    "show me what's interesting"
+)
+_MIN_ANALYTICAL_PHRASE_LEN = min(map(len, _ANALYTICAL_PHRASES))
+_ANALYTICAL_PHRASE_RE = _compile_union("|".join(map(re.escape, _ANALYTICAL_PHRASES)))
+
+# Openings that almost always introduce a specific, directly answerable query. "find " is
+# left out because "find patterns/trends..." is an analytical pattern
+_SPECIFIC_PREFIXES: Final[Tuple[str, ...]] = (
+    "how many ", "show me the top ", "calculate ", "what is the average ",
+    "what's the average ", "compare "
+)
+
+# Pattern matching for exploratory analytical requests
+_ANALYTICAL_PATTERNS: Final[Tuple[str, ...]] = (
+    r"what (insight|analysis|information) can (i|we|you) (get|derive|extract)",
+    r"suggest (some|potential|possible) (analysis|insights|questions)",
+    r"(what|which) (questions|analyses) (should|could|can) (i|we) (ask|explore)",
+    r"help me (understand|explore|analyze) (this|the|these) data",
+    r"what (can|could) (i|we) learn from (this|these) data",
+    r"what's interesting (about|in) (this|the|these) data",
+    r"(show|tell) me (what|some) insights",
+    r"(identify|find) (patterns|trends|anomalies|outliers)",
+    r"give me (ideas|suggestions) for analysis",
+    r"(how|what's the best way to) (analyze|understand) (this|these|the) data"
+)
+
+# All analytical patterns fused into one alternation so a request is scanned once;
+# each branch is a named group so matches can be attributed to distinct patterns
+_ANALYTICAL_UNION = _compile_union("|".join(
+    f"(?P<p{i}>{pattern})" for i, pattern in enumerate(_ANALYTICAL_PATTERNS)
+))
+
+# Keywords that signal an exploratory analytical request, matched as whole words
+_ANALYTICAL_KEYWORDS: Final[FrozenSet[str]] = frozenset([
+    "insights", "ideas", "explore", "discover", "possibilities",
+    "potential", "interesting", "patterns", "guidance"
+])
+
+# Keyword stems still matched as substrings so inflections count ("suggested", "recommendations")
+_ANALYTICAL_KEYWORD_STEMS: Final[Tuple[str, ...]] = ("suggest", "recommendation")
+
+# Requests shorter than the shortest keyword cannot match any analytical signal (every
+# pattern needs at least two words, so is longer still) and skip scoring entirely
+_MIN_ANALYTICAL_SIGNAL_LEN = min(map(len, (*_ANALYTICAL_KEYWORDS, *_ANALYTICAL_KEYWORD_STEMS)))
+
+# One automaton over the direct phrases and the keyword stems, each tagged with its kind;
+# whole-word keywords stay a set intersection since the automaton matches substrings
+if AHOCORASICK_AVAILABLE:
+    _ANALYTICAL_AUTOMATON = ahocorasick.Automaton()
+    for _kind, _words in (("phrase", _ANALYTICAL_PHRASES), ("stem", _ANALYTICAL_KEYWORD_STEMS)):
+        for _word in _words:
+            _ANALYTICAL_AUTOMATON.add_word(_word, (_kind, _word))
+    _ANALYTICAL_AUTOMATON.make_automaton()
+    del _kind, _words, _word
+
+# Punctuation becomes whitespace so a plain split() yields the request's words
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+# Every pattern and keyword counts as one signal; confidence for each possible match count
+# is precomputed so classification indexes a table instead of dividing
+_TOTAL_ANALYTICAL_SIGNALS: Final[int] = len(_ANALYTICAL_PATTERNS) + len(_ANALYTICAL_KEYWORDS) + len(_ANALYTICAL_KEYWORD_STEMS)
+_ANALYTICAL_CONFIDENCE: Final[Tuple[float, ...]] = tuple(i / _TOTAL_ANALYTICAL_SIGNALS for i in range(_TOTAL_ANALYTICAL_SIGNALS + 1))
+
+# Labelled example requests, listed per intent in the LLM's system prompt
+_INTENT_EXAMPLES = {
+    "specific": (
+        "How many sales did we have by region last month?",
+        "What is the average order value by product category?",
+        "Show me the top 10 customers by total spending.",
+        "Find transactions over $500 between January and March.",
+        "Calculate the monthly growth rate in new customer acquisitions.",
+        "Compare this year's sales to last year's by quarter."
+    ),
+    "exploratory_analytical": (
+        "What insights can I get from my sales data?",
+        "Suggest some interesting analyses for my customer database.",
+        "What are some patterns I should look for in this dataset?",
+        "Suggest some analyses I can run.",
+        "Give me some ideas for analyzing this data.",
+        "What questions should I ask about this data?"
+    ),
+    "exploratory_descriptive": (
+        "What are these datasets about?",
+        "Describe the data I have.",
+        "What kind of information do these tables contain?",
+        "What's in this database?",
+        "Show me an overview of my data.",
+        "What types of data do I have?",
+        "Tell me about these tables.",
+        "What can you tell me about these datasets?"
+    )
+}
+
+# Category definitions and examples, sent as the system message of every classification
+# call (single and batched) so this identical prefix can be served from the prompt cache
+_INTENT_SYSTEM_PROMPT: Final[str] = """Your task is to classify the user's data analysis request into one of three categories:
+1. "specific" - The user is requesting a specific analysis that can be directly translated to SQL.
+2. "exploratory_analytical" - The user is seeking analytical insights or suggestions about their data.
+3. "exploratory_descriptive" - The user is asking for a description or overview of the data itself.
+
+""" + "\n\n".join(
+    f"Examples of {intent.upper()} requests:\n" + "\n".join(f'- "{example}"' for example in examples)
+    for intent, examples in _INTENT_EXAMPLES.items()
+) + "\n"
+
+# Single-request user message, built once; only the request is substituted
+_LLM_PROMPT: Final[str] = """User request: "{request}"
+
+OUTPUT INSTRUCTIONS:
+1. Respond with ONLY ONE OF THESE PHRASES: "specific", "exploratory_analytical", or "exploratory_descriptive"
+2. Nothing else - no explanations, no json, no additional text
+"""
+
+# Rule-based analytical scores at or above this are trusted without asking the LLM
+# (roughly a third of all analytical signals matched)
+RULE_BASED_CONFIDENCE_THRESHOLD = 0.3
+
+# Labels are a handful of tokens, so generation is capped just above the longest one and
+# sampled deterministically; longer output could never be a valid label anyway
+INTENT_LABEL_MAX_TOKENS = 8
+
+# Requests packed into one LLM call by classify_user_intents
+INTENT_BATCH_SIZE = 16
+_BATCH_LABEL_RE = re.compile(r'^\s*(\d+)[.):]\s*"?([a-z_]+)"?\s*$', re.MULTILINE)
+
+# classify_user_intent_async coalesces requests arriving within this window (or until
+# INTENT_BATCH_SIZE are waiting) into one classify_user_intents call
+INTENT_BATCH_WINDOW_SECONDS = 0.01
+
+
+@dataclass
+class _IntentMicroBatch:
+    """Micro-batch state of one event loop; futures and timers cannot cross loops."""
+    requests: List[Tuple[str, "asyncio.Future"]] = field(default_factory=list)
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    tasks: Set["asyncio.Task"] = field(default_factory=set) # Keeps in-flight batches from being garbage collected
+
+
+_intent_micro_batches: Dict[asyncio.AbstractEventLoop, _IntentMicroBatch] = {}
+
+# Valid LLM labels mapped straight to the classification they produce
+_LLM_CLASSIFICATIONS: Final[Dict[str, Tuple[str, float]]] = {
+    label: (label, 0.95) for label in ("specific", "exploratory_analytical", "exploratory_descriptive")
+}
+
+# LRU cache of LLM classifications keyed by the normalized request text
+INTENT_CACHE_SIZE = 2048
+_INTENT_CACHE: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_INTENT_CACHE_LOCK = threading.Lock()
+
+
+def _normalize_request(user_request: str) -> str:
+    """Lowercases the request and collapses whitespace, for use as a cache key."""
+    return " ".join(user_request.lower().split())
+
+
+def _get_cached_intent(key: str) -> Optional[Tuple[str, float]]:
+    with _INTENT_CACHE_LOCK:
+        cached = _INTENT_CACHE.get(key)
+        if cached is not None:
+            _INTENT_CACHE.move_to_end(key)
+        return cached
+
+
+def _cache_intent(key: str, classification: Tuple[str, float]) -> None:
+    with _INTENT_CACHE_LOCK:
+        _INTENT_CACHE[key] = classification
+        _INTENT_CACHE.move_to_end(key)
+        if len(_INTENT_CACHE) > INTENT_CACHE_SIZE:
+            _INTENT_CACHE.popitem(last=False)
+
+
+def clear_intent_cache() -> None:
+    """Empties the classification cache (mainly for tests)."""
+    with _INTENT_CACHE_LOCK:
+        _INTENT_CACHE.clear()
+
+
 def classify_user_intent(user_request: str) -> Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]:
     """
     Classifies a user request as:
@@ -20,18 +239,176 @@ def classify_user_intent(user_request: str) -> Tuple[Literal["specific", "explor
         - Intent classification 
         - Confidence score (0.0-1.0)
     """
+    cache_key = _normalize_request(user_request)
+    classification = _classify_without_llm(cache_key)
+    if classification is not None:
+        return classification
+    
     # First, try LLM-based classification for highest accuracy
     try:
         llm_classification = _llm_classify_intent(user_request)
         if llm_classification:
             intent, confidence = llm_classification
-            logger.info(f"LLM classified request as '{intent}' with confidence {confidence}")
+            logger.info("LLM classified request as '%s' with confidence %s", intent, confidence)
+            _cache_intent(cache_key, (intent, confidence))
             return intent, confidence
     except Exception as e:
         logger.warning(f"LLM classification failed, falling back to rule-based: {e}")
     
-    # Fall back to rule-based classification if LLM fails
-    return _rule_based_classify_intent(user_request)
+    # Fall back to rule-based classification if LLM fails (not cached, so the LLM is retried next time)
+    return _rule_based_classify_intent(user_request, cache_key)
+
+
+def classify_user_intents(user_requests: List[str]) -> List[Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]]:
+    """
+    Classifies several user requests, sending the ones that need the LLM in batches of
+    INTENT_BATCH_SIZE per call instead of one call per request.
+    
+    Args:
+        user_requests: The user's natural language queries
+        
+    Returns:
+        One (intent, confidence) tuple per request, in order, as classify_user_intent would return
+    """
+    results: List[Optional[Tuple[str, float]]] = [None] * len(user_requests)
+    # Normalized request -> (original request, indexes of the requests sharing it)
+    pending: Dict[str, Tuple[str, List[int]]] = {}
+    
+    for index, user_request in enumerate(user_requests):
+        cache_key = _normalize_request(user_request)
+        if cache_key in pending:
+            pending[cache_key][1].append(index)
+            continue
+        classification = _classify_without_llm(cache_key)
+        if classification is not None:
+            results[index] = classification
+        else:
+            pending[cache_key] = (user_request, [index])
+    
+    pending_items = list(pending.items())
+    for batch_start in range(0, len(pending_items), INTENT_BATCH_SIZE):
+        batch = pending_items[batch_start:batch_start + INTENT_BATCH_SIZE]
+        classifications = _llm_classify_intent_batch([user_request for _, (user_request, _) in batch])
+        for (cache_key, (user_request, indexes)), classification in zip(batch, classifications):
+            if classification is not None:
+                _cache_intent(cache_key, classification)
+            else:
+                # Not cached, so the LLM is retried next time
+                classification = _rule_based_classify_intent(user_request, cache_key)
+            for index in indexes:
+                results[index] = classification
+    
+    return results
+
+
+async def classify_user_intent_async(user_request: str) -> Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]:
+    """
+    Async variant of classify_user_intent for use inside the event loop. Requests that
+    need the LLM are micro-batched with other concurrent requests into a single call,
+    which runs in a worker thread so the event loop is never blocked.
+    
+    Args:
+        user_request: The user's natural language query
+        
+    Returns:
+        Tuple of (intent, confidence), as classify_user_intent would return
+    """
+    classification = _classify_without_llm(_normalize_request(user_request))
+    if classification is not None:
+        return classification
+    
+    loop = asyncio.get_running_loop()
+    micro_batch = _get_intent_micro_batch(loop)
+    future = loop.create_future()
+    micro_batch.requests.append((user_request, future))
+    if len(micro_batch.requests) >= INTENT_BATCH_SIZE:
+        _flush_intent_requests(micro_batch)
+    elif micro_batch.flush_handle is None:
+        micro_batch.flush_handle = loop.call_later(INTENT_BATCH_WINDOW_SECONDS, _flush_intent_requests, micro_batch)
+    return await future
+
+
+def _get_intent_micro_batch(loop: asyncio.AbstractEventLoop) -> _IntentMicroBatch:
+    """Returns the running loop's micro-batch state, dropping that of loops since closed."""
+    for closed_loop in [other for other in _intent_micro_batches if other.is_closed()]:
+        del _intent_micro_batches[closed_loop]
+    micro_batch = _intent_micro_batches.get(loop)
+    if micro_batch is None:
+        micro_batch = _intent_micro_batches[loop] = _IntentMicroBatch()
+    return micro_batch
+
+
+def _flush_intent_requests(micro_batch: _IntentMicroBatch) -> None:
+    """Sends the requests waiting in the micro-batch window off for classification."""
+    if micro_batch.flush_handle is not None:
+        micro_batch.flush_handle.cancel()
+        micro_batch.flush_handle = None
+    # Requests whose caller stopped waiting (timeout, disconnect) are not worth an LLM call
+    batch = [(user_request, future) for user_request, future in micro_batch.requests if not future.done()]
+    micro_batch.requests.clear()
+    if batch:
+        task = asyncio.ensure_future(_classify_intent_batch_async(batch))
+        micro_batch.tasks.add(task)
+        task.add_done_callback(micro_batch.tasks.discard)
+
+
+async def _classify_intent_batch_async(batch: List[Tuple[str, "asyncio.Future"]]) -> None:
+    """Classifies one micro-batch in a worker thread and resolves its waiting futures."""
+    user_requests = [user_request for user_request, _ in batch]
+    try:
+        if len(user_requests) == 1:
+            classifications = [await asyncio.to_thread(classify_user_intent, user_requests[0])]
+        else:
+            classifications = await asyncio.to_thread(classify_user_intents, user_requests)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    for (_, future), classification in zip(batch, classifications):
+        if not future.done():
+            future.set_result(classification)
+
+
+def _classify_without_llm(cache_key: str) -> Optional[Tuple[str, float]]:
+    """
+    Classifies a normalized request from the rules (fast path or a confident score) or
+    the cache of earlier LLM classifications.
+    
+    Returns:
+        Tuple of (intent, confidence), or None if the request needs the LLM
+    """
+    # Blank requests carry no intent; don't spend an LLM call on them
+    if not cache_key:
+        return "specific", 1.0
+    
+    # Requests the rules classify with high confidence skip the LLM call entirely
+    fast_classification = _fast_path(cache_key)
+    if fast_classification is not None:
+        return fast_classification
+    
+    # Repeated requests reuse the earlier LLM classification
+    cached = _get_cached_intent(cache_key)
+    if cached is not None:
+        logger.info("Using cached classification '%s' with confidence %s", *cached)
+        return cached
+    
+    # Requests matching many analytical signals are unambiguous enough for the rules alone
+    analytical_confidence = _analytical_confidence(cache_key)
+    if analytical_confidence >= RULE_BASED_CONFIDENCE_THRESHOLD:
+        logger.info("Rule-based classification is confident (%.2f), skipping LLM", analytical_confidence)
+        return "exploratory_analytical", analytical_confidence
+    
+    return None
+
+
+classify_user_intent.cache_clear = clear_intent_cache
+
+
+def _quote_escape(user_request: str) -> str:
+    """Escapes double quotes so a request cannot close the quoted string it is embedded in."""
+    return user_request.replace('"', '\\"')
 
 
 def _llm_classify_intent(user_request: str) -> Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]:
@@ -44,148 +421,156 @@ def _llm_classify_intent(user_request: str) -> Tuple[Literal["specific", "explor
     Returns:
         Tuple of (intent, confidence) or None if classification fails
     """
-    prompt = f"""
-Your task is to classify the user's data analysis request into one of three categories:
-1. "specific" - The user is requesting a specific analysis that can be directly translated to SQL.
-2. "exploratory_analytical" - The user is seeking analytical insights or suggestions about their data.
-3. "exploratory_descriptive" - The user is asking for a description or overview of the data itself.
-
-Examples of SPECIFIC requests:
-- "How many sales did we have by region last month?"
-- "What is the average order value by product category?"
-- "Show me the top 10 customers by total spending."
-- "Find transactions over $500 between January and March."
-- "Calculate the monthly growth rate in new customer acquisitions."
-- "Compare this year's sales to last year's by quarter."
-
-Examples of EXPLORATORY_ANALYTICAL requests:
-- "What insights can I get from my sales data?"
-- "Suggest some interesting analyses for my customer database."
-- "What are some patterns I should look for in this dataset?"
-- "Suggest some analyses I can run."
-- "Give me some ideas for analyzing this data."
-- "What questions should I ask about this data?"
-
-Examples of EXPLORATORY_DESCRIPTIVE requests:
-- "What are these datasets about?"
-- "Describe the data I have."
-- "What kind of information do these tables contain?"
-- "What's in this database?"
-- "Show me an overview of my data."
-- "What types of data do I have?"
-- "Tell me about these tables."
-- "What can you tell me about these datasets?"
-
-User request: "{user_request}"
-
-OUTPUT INSTRUCTIONS:
-1. Respond with ONLY ONE OF THESE PHRASES: "specific", "exploratory_analytical", or "exploratory_descriptive"
-2. Nothing else - no explanations, no json, no additional text
-"""
+    prompt = _LLM_PROMPT.format(request=_quote_escape(user_request))
     
     try:
-        response = client.call_llm(prompt)
-        # Clean and normalize the response
+        response = client.call_llm(prompt, system_prompt=_INTENT_SYSTEM_PROMPT,
+                                   max_tokens=INTENT_LABEL_MAX_TOKENS, temperature=0)
+        # Clean and normalize the response, then ensure we got a valid classification
         response = response.strip().lower()
-        
-        # Ensure we got a valid classification
-        if response == "exploratory_analytical":
-            return "exploratory_analytical", 0.95
-        elif response == "exploratory_descriptive":
-            return "exploratory_descriptive", 0.95
-        elif response == "specific":
-            return "specific", 0.95
-        else:
+        classification = _LLM_CLASSIFICATIONS.get(response)
+        if classification is None:
             # If LLM didn't follow instructions exactly, log and fall back
             logger.warning(f"LLM returned invalid classification: '{response}'")
-            return None
+        return classification
     except Exception as e:
         logger.error(f"Error in LLM classification: {e}")
         return None
 
 
-def _rule_based_classify_intent(user_request: str) -> Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]:
+def _llm_classify_intent_batch(user_requests: List[str]) -> List[Optional[Tuple[str, float]]]:
     """
-    Rule-based backup classification method.
+    Classifies several requests with a single LLM call.
     
     Args:
-        user_request: The user's natural language query
+        user_requests: The user's natural language queries
         
     Returns:
-        Tuple containing intent classification and confidence
+        One (intent, confidence) tuple per request, or None where the LLM gave no valid label
     """
-    # Convert to lowercase for comparison
-    request_lower = user_request.lower().strip()
-    
-    # First check for descriptive patterns
-    descriptive_patterns = [
-        r"what (are|is) (these|this|the|those) (dataset|data|tables|database)s? about",
-        r"(describe|tell me about|overview of|summary of) (the|these|this|my) (data|dataset|tables)",
-        r"what (kind|type) of (data|information) (do |does |)(these|this|the|my) (dataset|data|tables)s? (have|contain)",
-        r"what('s| is) in (these|this|the|my) (data|dataset|tables|database)",
-        r"what (data|information) (do |)(i|we) have",
-        r"show me (what|the) data (i|we) have"
-    ]
-    
-    # Check for direct descriptive pattern matches
-    for pattern in descriptive_patterns:
-        if re.search(pattern, request_lower):
-            logger.info(f"Descriptive pattern match in: '{request_lower}'")
-            return "exploratory_descriptive", 0.95
-    
-    # Direct classification for common exploratory analytical phrases
-    analytical_phrases = [
-        "what are some suggested", 
-        "what insights", 
-        "suggest some",
-        "what analysis", 
-        "what can i learn from",
-        "give me some insights",
-        "what are the main insights",
-        "show me what's interesting"
-    ]
-    
-    # Check for direct match with common exploratory analytical phrases
-    for phrase in analytical_phrases:
-        if phrase in request_lower:
-            logger.info(f"Direct exploratory analytical phrase match: '{phrase}' in '{request_lower}'")
-            return "exploratory_analytical", 0.95
-    
-    # Pattern matching for exploratory analytical requests
-    analytical_patterns = [
-        r"what (insight|analysis|information) can (i|we|you) (get|derive|extract)",
-        r"suggest (some|potential|possible) (analysis|insights|questions)",
-        r"(what|which) (questions|analyses) (should|could|can) (i|we) (ask|explore)",
-        r"help me (understand|explore|analyze) (this|the|these) data",
-        r"what (can|could) (i|we) learn from (this|these) data",
-        r"what's interesting (about|in) (this|the|these) data",
-        r"(show|tell) me (what|some) insights",
-        r"(identify|find) (patterns|trends|anomalies|outliers)",
-        r"give me (ideas|suggestions) for analysis",
-        r"(how|what's the best way to) (analyze|understand) (this|these|the) data"
-    ]
-    
-    # Check for analytical keyword matches
-    analytical_keywords = [
-        "suggest", "recommendation", "insights", "ideas", 
-        "explore", "discover", "possibilities", "potential", 
-        "interesting", "patterns", "guidance"
-    ]
+    numbered_requests = "\n".join(
+        f'{number}. "{_quote_escape(user_request)}"' for number, user_request in enumerate(user_requests, 1)
+    )
+    prompt = f"""User requests:
+{numbered_requests}
+
+OUTPUT INSTRUCTIONS:
+1. Respond with one line per request, in the same order, formatted as "<number>. <category>"
+2. Each category must be ONLY ONE OF THESE PHRASES: "specific", "exploratory_analytical", or "exploratory_descriptive"
+3. Nothing else - no explanations, no json, no additional text
+"""
+    
+    classifications: List[Optional[Tuple[str, float]]] = [None] * len(user_requests)
+    try:
+        # Each "<number>. <label>" line needs a few tokens more than the label itself
+        response = client.call_llm(prompt, system_prompt=_INTENT_SYSTEM_PROMPT,
+                                   max_tokens=(INTENT_LABEL_MAX_TOKENS + 4) * len(user_requests),
+                                   temperature=0).lower()
+    except Exception as e:
+        logger.error(f"Error in batched LLM classification: {e}")
+        return classifications
+    
+    for match in _BATCH_LABEL_RE.finditer(response):
+        position = int(match.group(1)) - 1
+        classification = _LLM_CLASSIFICATIONS.get(match.group(2))
+        if 0 <= position < len(user_requests) and classification is not None:
+            classifications[position] = classification
+    
+    missing = classifications.count(None)
+    if missing:
+        logger.warning(f"LLM returned no valid classification for {missing} of {len(user_requests)} batched requests")
+    return classifications
+
+
+def _fast_path(request_lower: str) -> Optional[Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]]:
+    """
+    Cheap high-confidence checks on direct descriptive patterns, analytical phrases and
+    specific-query prefixes.
+    
+    Args:
+        request_lower: The lowercased user request
+        
+    Returns:
+        Tuple of (intent, confidence) on a direct match, otherwise None
+    """
+    if _DESCRIPTIVE_UNION.search(request_lower):
+        logger.info("Descriptive pattern match in: '%s'", request_lower)
+        return "exploratory_descriptive", 0.95
+    
+    if len(request_lower) < _MIN_ANALYTICAL_PHRASE_LEN:
+        phrase = None
+    elif AHOCORASICK_AVAILABLE:
+        phrase = next((word for _, (kind, word) in _ANALYTICAL_AUTOMATON.iter(request_lower) if kind == "phrase"), None)
+    else:
+        phrase_match = _ANALYTICAL_PHRASE_RE.search(request_lower)
+        phrase = phrase_match.group(0) if phrase_match else None
+    if phrase:
+        logger.info("Direct exploratory analytical phrase match: '%s' in '%s'", phrase, request_lower)
+        return "exploratory_analytical", 0.95
+    
+    if request_lower.startswith(_SPECIFIC_PREFIXES):
+        logger.info("Specific query prefix match in: '%s'", request_lower)
+        return "specific", 0.95
+    
+    return None
+
+
+def _analytical_confidence(request_lower: str) -> float:
+    """
+    Scores a lowercased request by the share of analytical patterns and keywords it matches.
+    
+    Args:
+        request_lower: The lowercased user request
+        
+    Returns:
+        Analytical confidence (0.0-1.0)
+    """
+    if len(request_lower) < _MIN_ANALYTICAL_SIGNAL_LEN:
+        return 0.0
     
     # Count analytical pattern matches
-    analytical_pattern_matches = sum(1 for pattern in analytical_patterns if re.search(pattern, request_lower))
+    analytical_pattern_matches = len({match.lastgroup for match in _ANALYTICAL_UNION.finditer(request_lower)})
     
     # Count analytical keyword matches
-    analytical_keyword_matches = sum(1 for keyword in analytical_keywords if keyword in request_lower)
+    request_words = set(request_lower.translate(_PUNCTUATION_TO_SPACE).split())
+    analytical_keyword_matches = len(request_words & _ANALYTICAL_KEYWORDS)
+    if AHOCORASICK_AVAILABLE:
+        analytical_keyword_matches += len({word for _, (kind, word) in _ANALYTICAL_AUTOMATON.iter(request_lower) if kind == "stem"})
+    else:
+        analytical_keyword_matches += sum(1 for stem in _ANALYTICAL_KEYWORD_STEMS if stem in request_lower)
+    
+    # Look up analytical confidence
+    analytical_confidence = _ANALYTICAL_CONFIDENCE[analytical_pattern_matches + analytical_keyword_matches]
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Rule-based classification for '%s...': "
+                     "analytical_pattern_matches=%d, analytical_keyword_matches=%d, analytical_confidence=%.2f",
+                     request_lower[:30], analytical_pattern_matches, analytical_keyword_matches, analytical_confidence)
+    
+    return analytical_confidence
+
+
+def _rule_based_classify_intent(user_request: str, request_lower: Optional[str] = None) -> Tuple[Literal["specific", "exploratory_analytical", "exploratory_descriptive"], float]:
+    """
+    Rule-based backup classification method.
+    
+    Args:
+        user_request: The user's natural language query
+        request_lower: The request already lowercased by the caller, if available
+        
+    Returns:
+        Tuple containing intent classification and confidence
+    """
+    # Convert to lowercase for comparison
+    if request_lower is None:
+        request_lower = user_request.lower().strip()
     
-    # Calculate analytical confidence
-    total_analytical_signals = len(analytical_patterns) + len(analytical_keywords)
-    analytical_confidence = (analytical_pattern_matches + analytical_keyword_matches) / total_analytical_signals
+    # Direct descriptive patterns and analytical phrases settle the intent outright
+    fast_classification = _fast_path(request_lower)
+    if fast_classification is not None:
+        return fast_classification
     
-    logger.debug(f"Rule-based classification for '{user_request[:30]}...': " 
-                f"analytical_pattern_matches={analytical_pattern_matches}, "
-                f"analytical_keyword_matches={analytical_keyword_matches}, " 
-                f"analytical_confidence={analytical_confidence:.2f}")
+    analytical_confidence = _analytical_confidence(request_lower)
     
     if analytical_confidence > 0.05:  # Very low threshold to capture more exploratory requests
         return "exploratory_analytical", analytical_confidence
@@ -0,0 +1,5 @@
+import os
+
+# src.llm.client builds the OpenAI client at import time and exits without a key;
+# tests never reach the API (call_llm is monkeypatched), so any placeholder will do
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-placeholder")
@@ -6,33 +6,31 @@ from src.data_handling.db_utils import get_sqlalchemy_engine
 
 # Define test data path relative to the conftest file location
 TEST_DATA_DIR = Path(__file__).parent.parent / "data" # Assumes data dir is sibling to tests
-TEST_DB_PATH = Path(__file__).parent / "test_analysis.db" # Temporary DB for tests
+# Named in-memory DB with a shared cache, so every connection in the session sees the same data
+TEST_DB_URI = "sqlite:///file:test_analysis?mode=memory&cache=shared&uri=true"
 
 @pytest.fixture(scope="session") # Run once per test session
 def test_db_engine():
-    """Fixture to set up and tear down a test SQLite database."""
-    db_uri = f"sqlite:///{TEST_DB_PATH.resolve()}"
-
-    # Ensure clean state before tests
-    if TEST_DB_PATH.exists():
-        TEST_DB_PATH.unlink()
-
+    """Fixture to set up and tear down an in-memory test SQLite database."""
     # Create dummy data and load it (adjust paths/data as needed)
     dummy_csv = TEST_DATA_DIR / "sample_sales.csv" # Or create dummy data directly here
     if not dummy_csv.exists():
        pytest.skip(f"Test data CSV not found at {dummy_csv}") # Skip if data missing
 
+    engine = get_sqlalchemy_engine(TEST_DB_URI)
+    # A shared in-memory DB only lives while a connection is open, so hold one for the session
+    keepalive = engine.connect()
+
     try:
         # Use your loader function to populate the test DB
-        load_csv_to_sqlite(dummy_csv, db_uri, 'sales')
+        load_csv_to_sqlite(dummy_csv, TEST_DB_URI, 'sales')
     except Exception as e:
+        keepalive.close()
+        engine.dispose()
         pytest.fail(f"Failed to set up test database: {e}")
 
-    engine = get_sqlalchemy_engine(db_uri)
     yield engine # Provide the engine to tests
 
-    # Teardown: Close connections if needed (usually handled by SQLAlchemy)
-    # and remove the test database file
+    # Teardown: closing the last connection discards the in-memory database
+    keepalive.close()
     engine.dispose() # Good practice to dispose engine
-    if TEST_DB_PATH.exists():
-        TEST_DB_PATH.unlink()
\ No newline at end of file
@@ -0,0 +1,135 @@
+import pytest
+from src.llm import client
+from src.schema_generator import suggest
+from src.schema_generator.suggest import (
+    _extract_prisma_schema_from_llm,
+    _fix_missing_relations,
+    _parse_schema,
+    _read_schema_cache,
+    _write_schema_cache,
+    _RELATIONS_WARNING_COMMENT,
+)
+
+SCHEMA = """datasource db {
+  provider = "sqlite"
+  url      = env("DATABASE_URL")
+}
+
+generator client {
+  provider = "prisma-client-py"
+}
+
+model Customer {
+  id    Int    @id
+  name  String
+}
+
+model Order {
+  id         Int      @id
+  customerId Int
+  customer   Customer @relation(fields: [customerId], references: [id])
+}"""
+
+COMPLETE_SCHEMA = SCHEMA.replace("  name  String\n", "  name  String\n  orders Order[]\n")
+
+
+@pytest.mark.parametrize("raw_response", [
+    f"```prisma\n{SCHEMA}\n```",
+    f"```Prisma\n{SCHEMA}\n```",
+    f"```\n{SCHEMA}\n```",
+    f"Here is the schema you asked for:\n\n```prisma\n{SCHEMA}\n```\n\nLet me know if you need changes.",
+])
+def test_extract_fenced_schema(raw_response: str):
+    """Test that fenced schemas are returned without fences, tag or surrounding text."""
+    assert _extract_prisma_schema_from_llm(raw_response) == SCHEMA
+
+def test_extract_unfenced_schema_trims_preamble():
+    """Test that text before the first block of an unfenced schema is dropped."""
+    raw_response = f"Sure! Based on your CSV files, here is a schema:\n\n{SCHEMA}\n"
+    assert _extract_prisma_schema_from_llm(raw_response) == SCHEMA
+
+def test_extract_unfenced_schema_starting_with_comment():
+    """Test that an unfenced schema opening with a comment is kept whole."""
+    raw_response = f"\n// Suggested schema\n{SCHEMA}\n"
+    assert _extract_prisma_schema_from_llm(raw_response) == f"// Suggested schema\n{SCHEMA}"
+
+def test_parse_schema_models_and_relations():
+    """Test that model bodies, fields and both relation sides are extracted."""
+    parsed = _parse_schema(COMPLETE_SCHEMA)
+    assert set(parsed.models) == {"Customer", "Order"}
+    assert parsed.field_names["Customer"] == {"id", "name", "orders"}
+    assert parsed.field_names["Order"] == {"id", "customerId", "customer"}
+    assert parsed.relations["Customer"] == [
+        {"field": "orders", "target_model": "Order", "type": "many"}
+    ]
+    assert parsed.relations["Order"] == [{
+        "field": "customer", "target_model": "Customer",
+        "source_field": "customerId", "target_field": "id", "type": "one"
+    }]
+    assert parsed.relation_types == {("Customer", "Order"): {"many"}, ("Order", "Customer"): {"one"}}
+    start, end = parsed.body_spans["Customer"]
+    assert COMPLETE_SCHEMA[start:end] == parsed.models["Customer"]
+
+def test_parse_schema_ignores_unterminated_model():
+    """Test that a trailing model block without a closing brace is left out."""
+    parsed = _parse_schema(f"{COMPLETE_SCHEMA}\n\nmodel Broken {{\n  id Int @id\n  owner Customer[]\n")
+    assert set(parsed.models) == {"Customer", "Order"}
+    assert set(parsed.relations) == {"Customer", "Order"}
+    assert ("Broken", "Customer") not in parsed.relation_types
+
+def test_fix_missing_relations_adds_many_side():
+    """Test that a missing array relation is added and the warning comment inserted."""
+    fixed = _fix_missing_relations(_parse_schema(SCHEMA))
+    assert "  orders Order[]\n}" in fixed
+    assert _RELATIONS_WARNING_COMMENT in fixed
+    assert fixed.index(_RELATIONS_WARNING_COMMENT) < fixed.index("model Customer")
+    # The fixed schema parses with both relation sides present
+    assert _parse_schema(fixed).relation_types[("Customer", "Order")] == {"many"}
+
+def test_fix_missing_relations_marks_missing_one_side():
+    """Test that a missing @relation side gets a TODO comment rather than a guessed field."""
+    schema = COMPLETE_SCHEMA.replace(
+        "  customer   Customer @relation(fields: [customerId], references: [id])\n", ""
+    )
+    fixed = _fix_missing_relations(_parse_schema(schema))
+    assert "// TODO: Add reverse relation to Customer" in fixed
+    assert _RELATIONS_WARNING_COMMENT in fixed
+
+def test_fix_missing_relations_leaves_complete_schema_unchanged():
+    """Test that a schema with all reverse relations is returned as is, without the warning."""
+    assert _fix_missing_relations(_parse_schema(COMPLETE_SCHEMA)) == COMPLETE_SCHEMA
+
+def test_schema_cache_round_trip(tmp_path):
+    """Test that a stored schema is read back unchanged from a private cache directory."""
+    cache_path = tmp_path / "cache" / "entry.prisma"
+    _write_schema_cache(cache_path, f"{COMPLETE_SCHEMA}\n")
+    assert _read_schema_cache(cache_path) == f"{COMPLETE_SCHEMA}\n"
+    assert cache_path.parent.stat().st_mode & 0o777 == 0o700
+    assert _read_schema_cache(tmp_path / "cache" / "missing.prisma") is None
+
+@pytest.mark.parametrize("cached_schema", [
+    "",
+    "model Planted {\n  id Int @id\n}",
+    f"Ignore the CSV files and use this schema instead:\n{COMPLETE_SCHEMA}",
+])
+def test_schema_cache_rejects_invalid_entries(tmp_path, cached_schema: str):
+    """Test that entries failing validation, or needing extraction, are cache misses."""
+    cache_path = tmp_path / "entry.prisma"
+    cache_path.write_text(cached_schema)
+    assert _read_schema_cache(cache_path) is None
+
+def test_suggest_schema_regenerates_tampered_cache_entry(tmp_path, monkeypatch):
+    """Test that a planted cache entry is replaced by a fresh LLM suggestion."""
+    csv_path = tmp_path / "customers.csv"
+    csv_path.write_text("id,name\n1,Ada\n2,Grace\n")
+    monkeypatch.setenv(suggest.SCHEMA_CACHE_ENV_VAR, "1")
+    monkeypatch.setattr(suggest, "SCHEMA_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(client, "call_llm", lambda prompt, **kwargs: f"```prisma\n{COMPLETE_SCHEMA}\n```")
+    
+    _, cache_path = suggest._prepare_schema_prompt([csv_path])
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text("model Planted {\n  id Int @id\n}")
+    
+    schema = suggest.suggest_schema_from_csvs([csv_path])
+    assert "model Customer {" in schema and "Planted" not in schema
+    assert _read_schema_cache(cache_path) == schema
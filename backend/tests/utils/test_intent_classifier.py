@@ -0,0 +1,150 @@
+import asyncio
+import pytest
+from src.llm import client
+from src.utils import intent_classifier
+from src.utils.intent_classifier import classify_user_intent
+
+# Specific data questions that share wording with the descriptive examples; they must
+# reach SQL generation rather than the dataset-description branch
+SPECIFIC_QUERIES = [
+    "Show me an overview of my sales by month",
+    "What can you tell me about sales in Q3?",
+    "What types of payment methods do I have?",
+    "What data types does the price column have?",
+    "Show me an overview of revenue",
+    "Describe the revenue trend for the last quarter",
+    "Tell me about the orders placed yesterday",
+]
+
+@pytest.fixture(autouse=True)
+def clear_intent_cache():
+    """Fixture to isolate tests from classifications cached by earlier ones."""
+    classify_user_intent.cache_clear()
+    yield
+    classify_user_intent.cache_clear()
+
+class FakeLLM:
+    """Stands in for client.call_llm, returning a fixed response and recording prompts."""
+    def __init__(self):
+        self.response = ""
+        self.prompts = []
+
+    def __call__(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.response
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeLLM:
+    """Fixture replacing client.call_llm with a FakeLLM."""
+    fake = FakeLLM()
+    monkeypatch.setattr(client, "call_llm", fake)
+    return fake
+
+@pytest.mark.parametrize("user_request", SPECIFIC_QUERIES)
+def test_specific_queries_are_not_diverted_locally(user_request: str):
+    """Test that specific queries are never classified as exploratory without the LLM."""
+    classification = intent_classifier._classify_without_llm(intent_classifier._normalize_request(user_request))
+    assert classification is None or classification[0] == "specific"
+
+@pytest.mark.parametrize("earlier_request, user_request", [
+    ("what columns does the orders table have", "what columns does the orders table have nulls in"),
+    ("what kind of information is in the customers table",
+     "what kind of information is in the customers table for vip customers"),
+])
+def test_similar_wording_does_not_reuse_classification(fake_llm: FakeLLM, earlier_request: str, user_request: str):
+    """Test that a request sharing most of its wording with a cached one still reaches the LLM."""
+    fake_llm.response = "exploratory_descriptive"
+    classify_user_intent(earlier_request)
+    fake_llm.response = "specific"
+    assert classify_user_intent(user_request) == ("specific", 0.95)
+    assert len(fake_llm.prompts) == 2
+
+@pytest.mark.parametrize("user_request", SPECIFIC_QUERIES)
+def test_specific_queries_follow_llm_label(fake_llm: FakeLLM, user_request: str):
+    """Test that specific queries are classified as the LLM labels them."""
+    fake_llm.response = "specific"
+    intent, _ = classify_user_intent(user_request)
+    assert intent == "specific"
+
+# Requests none of the rules or caches settle, so classify_user_intents asks the LLM
+BATCH_QUERIES = [
+    "orders per store please",
+    "revenue by region for 2023",
+    "list suppliers in germany",
+]
+
+def test_classify_user_intents_single_llm_call(fake_llm: FakeLLM):
+    """Test that pending requests share one LLM call and keep their order."""
+    fake_llm.response = "1. specific\n2. exploratory_analytical\n3. exploratory_descriptive"
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results == [("specific", 0.95), ("exploratory_analytical", 0.95), ("exploratory_descriptive", 0.95)]
+    assert len(fake_llm.prompts) == 1
+
+def test_classify_user_intents_lines_out_of_order(fake_llm: FakeLLM):
+    """Test that labels are matched to requests by number, not by line position."""
+    fake_llm.response = "3. exploratory_descriptive\n1. specific\n2. exploratory_analytical"
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results == [("specific", 0.95), ("exploratory_analytical", 0.95), ("exploratory_descriptive", 0.95)]
+
+def test_classify_user_intents_quoted_labels(fake_llm: FakeLLM):
+    """Test that quoted labels and other number separators are accepted."""
+    fake_llm.response = '1) "specific"\n2: "exploratory_analytical"\n  3. "Exploratory_Descriptive"  '
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results == [("specific", 0.95), ("exploratory_analytical", 0.95), ("exploratory_descriptive", 0.95)]
+
+def test_classify_user_intents_missing_lines_fall_back_to_rules(fake_llm: FakeLLM):
+    """Test that requests without a line in the response get the rule-based classification."""
+    fake_llm.response = "2. exploratory_analytical"
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results[1] == ("exploratory_analytical", 0.95)
+    assert results[0] == intent_classifier._rule_based_classify_intent(BATCH_QUERIES[0])
+    assert results[2] == intent_classifier._rule_based_classify_intent(BATCH_QUERIES[2])
+
+def test_classify_user_intents_invalid_labels_fall_back_to_rules(fake_llm: FakeLLM):
+    """Test that invalid or out-of-range labels fall back to rules and are not cached."""
+    fake_llm.response = "1. specific\n2. analytical\n3. maybe_descriptive\n4. specific"
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results[0] == ("specific", 0.95)
+    assert results[1] == intent_classifier._rule_based_classify_intent(BATCH_QUERIES[1])
+    assert results[2] == intent_classifier._rule_based_classify_intent(BATCH_QUERIES[2])
+    
+    # Only the valid label was cached, so the rest are sent to the LLM again
+    fake_llm.response = "1. exploratory_analytical\n2. exploratory_descriptive"
+    results = intent_classifier.classify_user_intents(BATCH_QUERIES)
+    assert results == [("specific", 0.95), ("exploratory_analytical", 0.95), ("exploratory_descriptive", 0.95)]
+    assert BATCH_QUERIES[0] not in fake_llm.prompts[1]
+
+def test_classify_user_intents_duplicates_share_one_slot(fake_llm: FakeLLM):
+    """Test that requests equal after normalization are sent once and share the label."""
+    fake_llm.response = "1. specific\n2. exploratory_descriptive"
+    requests = ["Orders per store  please", "list suppliers in germany", "orders per STORE please"]
+    results = intent_classifier.classify_user_intents(requests)
+    assert results == [("specific", 0.95), ("exploratory_descriptive", 0.95), ("specific", 0.95)]
+    prompt = fake_llm.prompts[0]
+    assert prompt.lower().count("orders per store") == 1
+    assert '2. "list suppliers in germany"' in prompt
+
+def test_classify_user_intent_async_batches_concurrent_requests(fake_llm: FakeLLM):
+    """Test that concurrent async requests are classified together in one LLM call."""
+    fake_llm.response = "1. specific\n2. exploratory_analytical\n3. exploratory_descriptive"
+    async def classify_all():
+        return await asyncio.gather(*(intent_classifier.classify_user_intent_async(q) for q in BATCH_QUERIES))
+    results = asyncio.run(classify_all())
+    assert results == [("specific", 0.95), ("exploratory_analytical", 0.95), ("exploratory_descriptive", 0.95)]
+    assert len(fake_llm.prompts) == 1
+
+def test_classify_user_intent_async_survives_abandoned_loop(fake_llm: FakeLLM):
+    """Test that a request queued on an event loop that ended does not stall later loops."""
+    fake_llm.response = "specific"
+    async def abandon_request():
+        with pytest.raises(asyncio.TimeoutError):
+            # Times out inside the batch window, leaving the request queued when the loop ends
+            await asyncio.wait_for(intent_classifier.classify_user_intent_async(BATCH_QUERIES[0]),
+                                   intent_classifier.INTENT_BATCH_WINDOW_SECONDS / 10)
+    asyncio.run(abandon_request())
+    
+    async def classify_with_timeout():
+        return await asyncio.wait_for(intent_classifier.classify_user_intent_async(BATCH_QUERIES[1]), 5)
+    assert asyncio.run(classify_with_timeout()) == ("specific", 0.95)
+    # The abandoned request was never sent to the LLM
+    assert len(fake_llm.prompts) == 1